@@ -1,6 +1,28 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger('sdh.table')
 
 
 class SdhTableApp(AppConfig):
     name = 'sdh.table'
     verbose_name = 'SDH Table rendering engine'
+
+    def ready(self):
+        if getattr(settings, 'SDH_TABLE_PUSH', False):
+            from .push import watch_tables
+            from .warmup import autodiscover
+
+            autodiscover()
+            watch_tables()
+
+        if getattr(settings, 'SDH_TABLE_WARMUP', False):
+            from .warmup import warmup
+
+            errors, warnings = warmup()
+            for error in errors:
+                logger.warning(error)
+            for warning in warnings:
+                logger.info(warning)
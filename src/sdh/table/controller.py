@@ -1,14 +1,43 @@
+import asyncio
 import csv
+import hashlib
+import json
+import operator
 import warnings
-from datetime import datetime
-
-from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
+from copy import copy, deepcopy
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import reduce
+from uuid import UUID
+
+from asgiref.sync import sync_to_async
+from django import VERSION as DJANGO_VERSION
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Avg, Count, Max, Min, Q, QuerySet, Sum
+from django.http import (HttpResponse, HttpResponseNotModified, HttpResponseRedirect, JsonResponse,
+                         StreamingHttpResponse)
 from django.template.loader import render_to_string
-
-from .datasource import BaseDatasource
-from .paginator import Paginator
-from .shortcuts import fn_value, get_object_or_none
-from .table import BoundRow, CellTitle
+from django.utils.http import parse_etags, quote_etag
+
+from . import push
+from .datasource import BaseDatasource, QSDataSource, SnapshotDataSource
+from .dbutils import QueryTimeout, time_limit
+from .debug import NULL_DETECTOR, QueryDetector
+from .paginator import LazyPaginator, Paginator
+from .shortcuts import atoi, fn_value, get_cache, get_object_or_none
+from .table import BoundRow, CellFooter, CellTitle, GroupRow
+from .timing import NULL_TIMER, PhaseTimer
+from .widgets import BatchFormatWidget
+
+AGGREGATE_FUNCTIONS = {
+    'sum': Sum,
+    'avg': Avg,
+    'min': Min,
+    'max': Max,
+    'count': Count,
+}
 
 
 class TableController:
@@ -29,6 +58,35 @@ class TableController:
         self.form_filter_instance = None
         self.search_value = None
         self.allow_manage_profiles = True
+        self._source_prepared = False
+        self._etag = None
+        self._session_state = None
+        self._aggregates = None
+        self._facet_counts = None
+        self._page_rows = None
+        self._annotated = set()
+        self.restored = False
+        self.refresh_snapshot = False
+
+        timing = self.table.timing
+        if timing is None:
+            timing = getattr(settings, 'SDH_TABLE_TIMING', False)
+        self.timer = PhaseTimer(self) if timing else NULL_TIMER
+
+        self.push_enabled = self.table.push
+        if self.push_enabled is None:
+            self.push_enabled = getattr(settings, 'SDH_TABLE_PUSH', False)
+
+        self.query_detector_mode = self.table.query_detector or getattr(settings, 'SDH_TABLE_QUERY_DETECTOR', None)
+        self.query_detector = NULL_DETECTOR
+
+        self.count_timeout = self.table.count_timeout or getattr(settings, 'SDH_TABLE_COUNT_TIMEOUT', None)
+        self.count_unknown = False
+        self._count_exceeded = False
+
+        read_database = self.table.read_database or getattr(settings, 'SDH_TABLE_READ_DATABASE', None)
+        if read_database and hasattr(self.source, 'using'):
+            self.source = self.source.using(read_database)
 
         self.row_per_page = row_per_page
         self.table.request = self.request
@@ -46,6 +104,76 @@ class TableController:
                                               row_per_page=self.row_per_page,
                                               request=self.request,
                                               skip_startup_recalc=True)
+        self.paginator.timer = self.timer
+        self.paginator.count_timeout = self.count_timeout
+        self.paginator.concurrent = self.table.concurrent_count or getattr(settings, 'SDH_TABLE_CONCURRENT_COUNT', False)
+
+    def calc_paginator(self):
+        if not self.paginator:
+            return
+        if self._count_exceeded and not self.is_group_paginated() and not isinstance(self.paginator, LazyPaginator):
+            # rows count of aggregate query exceeded count_timeout, do not count again
+            self.use_lazy_paginator()
+            return
+        try:
+            self._calc_paginator()
+        except QueryTimeout:
+            self.use_lazy_paginator()
+
+    def use_lazy_paginator(self):
+        """
+        Switch to ``LazyPaginator`` when rows count exceeds ``count_timeout``, pages are
+        navigated then by existence of the next page and ``count_unknown`` is set.
+        """
+        paginator = LazyPaginator(self.paginator._queryset,
+                                  row_per_page=self.row_per_page,
+                                  request=self.request,
+                                  skip_startup_recalc=True)
+        paginator.timer = self.timer
+        paginator.cache_key = self.paginator.cache_key
+        paginator.prefetch_pages = self.paginator.prefetch_pages
+        paginator.prefetch_timeout = self.paginator.prefetch_timeout
+        self.paginator = paginator
+        self.count_unknown = True
+        self.paginator.calc()
+
+    def _calc_paginator(self):
+        if self.is_group_paginated():
+            self.paginator.set_queryset(QSDataSource(self.source.group_keys(), primary_key=None))
+            self.paginator.calc()
+            return
+        snapshot = self.get_snapshot()
+        if snapshot is not None:
+            self.paginator.set_queryset(snapshot)
+        elif self.table.prefetch_pages:
+            self.paginator.enable_prefetch(self.get_state_key(),
+                                           pages=self.table.prefetch_pages,
+                                           timeout=self.table.prefetch_timeout)
+        self.paginator.calc()
+
+    def get_snapshot(self):
+        """
+        Return ``SnapshotDataSource`` with ordered primary keys of the filtered datasource
+        kept in cache for ``Meta.snapshot_timeout`` seconds, or None when snapshot is disabled
+        or result has more than ``Meta.snapshot_max_rows`` rows.
+        Snapshot is refreshed by request without page number and reused while paging.
+        """
+        if not self.table.snapshot_timeout or not hasattr(self.source, 'fetch_pks'):
+            return None
+
+        self.prepare_source()
+        cache = get_cache()
+        key = 'sdh_table:%s:snapshot' % self.get_state_key()
+        pks = cache.get(key) if 'page' in self.request.GET and not self.refresh_snapshot else None
+        if pks is None:
+            pks = self.source.fetch_pks(0, self.table.snapshot_max_rows + 1)
+            if len(pks) > self.table.snapshot_max_rows:
+                # too large, remember it to not fetch primary keys on every page
+                pks = False
+            cache.set(key, pks, self.table.snapshot_timeout)
+        if pks is False:
+            return None
+        return SnapshotDataSource(self.source, pks)
 
     def show_column(self, column_name):
         if column_name not in self.table.columns:
@@ -57,16 +185,116 @@ class TableController:
         self.visible_columns.append(column_name)
         return True
 
-    def get_paginated_rows(self):
-        if self.paginator:
+    def fetch_page(self):
+        """
+        Fetch rows of the current page ahead of rendering, so the template reuses them
+        and time of the page query is not counted into ``render`` phase.
+        """
+        if self._page_rows is None:
+            self._page_rows = self._get_page_rows(fetch=True)
+
+    def _get_page_rows(self, fetch=False):
+        group_keys = None
+        if self.is_group_paginated():
+            group_keys = list(self.paginator.get_items())
+            row_iterator = self.source.group_filter(group_keys)
+        elif self.paginator:
             row_iterator = self.paginator.get_items()
         else:
             row_iterator = self.source._clone()
 
-        row_index = 0
-        for row in row_iterator:
-            row_index += 1
-            yield BoundRow(self, row_index, row)
+        # rows page is fetched ahead to know group keys for subtotals query
+        page_groups = bool(self.table.group_by and self.paginator and group_keys is None)
+        if fetch or self.timer.enabled or page_groups:
+            with self.timer.phase('fetch'):
+                row_iterator = list(row_iterator)
+        if page_groups:
+            group_keys = list(dict.fromkeys(row.sdh_group for row in row_iterator))
+        return row_iterator, group_keys
+
+    def get_paginated_rows(self, group_rows=True):
+        if self._page_rows is not None:
+            row_iterator, group_keys = self._page_rows
+        else:
+            row_iterator, group_keys = self._get_page_rows()
+
+        if self.query_detector_mode:
+            self.query_detector = QueryDetector(self, self.query_detector_mode)
+        detector = self.query_detector
+
+        bound_rows = (BoundRow(self, row_index, row) for row_index, row in enumerate(row_iterator, 1))
+        with detector.capture():
+            batch_columns = self.get_batch_columns()
+            if batch_columns:
+                bound_rows = list(bound_rows)
+                self.format_columns(bound_rows, batch_columns)
+            if self.table.group_by and group_rows:
+                bound_rows = self.iter_group_rows(bound_rows, group_keys)
+
+            for bound_row in bound_rows:
+                detector.set_row(bound_row.row_index)
+                yield bound_row
+        detector.check()
+
+    def get_group_ref(self):
+        return self.table.columns.get_shared(self.table.group_by).refname
+
+    def is_group_paginated(self):
+        """
+        True when ``Meta.group_paginate`` is 'groups' so a page holds whole groups instead of a rows slice.
+        """
+        return bool(self.paginator and self.table.group_by and self.table.group_paginate == 'groups')
+
+    def get_group_aggregates(self, keys=None):
+        """
+        Return ``{group key: (aggregates, rows count)}`` for given group keys, or all groups
+        when keys is None, computed by one grouped aggregate query.
+        """
+        expressions = self.get_aggregate_expressions()
+        result = {}
+        for group_key, row in self.source.aggregate_groups(keys, **self.get_aggregate_kwargs(expressions)).items():
+            result[group_key] = (self.unpack_aggregates(expressions, row), row['sdh_count'])
+        return result
+
+    def iter_group_rows(self, bound_rows, keys=None):
+        """
+        Interleave data rows, ordered by group key, with group header and subtotal rows.
+        """
+        subtotals = self.get_group_aggregates(keys)
+        group = last_row = None
+        for bound_row in bound_rows:
+            key = bound_row.row.sdh_group
+            if group is None or key != group.key:
+                if group is not None:
+                    yield GroupRow(self, group.key, last_row, group.aggregates, group.count, is_header=False)
+                aggregates, count = subtotals.get(key, ({}, 0))
+                group = GroupRow(self, key, bound_row, aggregates, count, is_header=True)
+                yield group
+            last_row = bound_row
+            yield bound_row
+        if group is not None:
+            yield GroupRow(self, group.key, last_row, group.aggregates, group.count, is_header=False)
+
+    def get_batch_columns(self):
+        """
+        Return visible columns which widgets format whole page column at once.
+        Widgets which override ``html_cell`` are rendered cell by cell.
+        """
+        return [(key, column) for key, column in self.iter_columns()
+                if getattr(column, 'batch_format', False)
+                and type(column).html_cell is BatchFormatWidget.html_cell
+                and not hasattr(self.table, 'render_%s' % key)]
+
+    def format_columns(self, bound_rows, columns):
+        detector = self.query_detector
+        for key, column in columns:
+            with self.timer.column(key), detector.column(key):
+                values = []
+                for bound_row in bound_rows:
+                    detector.set_row(bound_row.row_index)
+                    values.append(bound_row.get_value(key, column))
+                for bound_row, text in zip(bound_rows, column.format_values(values)):
+                    bound_row.formatted[key] = text
 
     def set_page(self, page_number):
         if self.paginator:
@@ -83,6 +311,7 @@ class TableController:
             self.sort_asc = asc
 
             column = self.table.columns[column_name]
+            self.annotate_column(column_name, column)
             if hasattr(self.table, 'order_by_%s' % column_name):
                 order_callback = getattr(self.table, 'order_by_%s' % column_name)
                 order_callback(column, self.source, asc)
@@ -97,6 +326,18 @@ class TableController:
             return True
         return False
 
+    def annotate_column(self, key, column):
+        """
+        Annotate datasource with expression of the column, once per request.
+        """
+        if column.expression is None or key in self._annotated:
+            return
+        self._annotated.add(key)
+        if isinstance(self.source, BaseDatasource):
+            self.source.annotate(**{column.refname: column.expression})
+        else:
+            self.source = self.source.annotate(**{column.refname: column.expression})
+
     def get_sort(self):
         if not self.sort_by:
             return ''
@@ -124,48 +365,309 @@ class TableController:
     def apply_search(self, value):
         self.search_value = value
 
-    def restore(self, profile_id=None):
-        from .models import TableViewProfile
-        state = None
+    def prepare_source(self):
+        """
+        Annotate expression columns, apply current filter and search value to the datasource.
+        Safe to call several times, the datasource is filtered only once.
+        """
+        if self._source_prepared:
+            return
+        self._source_prepared = True
+        for key, column in self.iter_columns():
+            self.annotate_column(key, column)
+        self.table.apply_filter(self.filter, self.source)
+        if self.search_value:
+            self.table.apply_search(self.search_value, self.source)
+        if self.table.group_by:
+            self.source.set_group(self.get_group_ref())
+
+    def get_state_key(self):
+        """
+        Return fingerprint of the current view: table, state, search value and datasource query.
+        """
+        parts = [self.table.id, self.get_state(), self.search_value]
+        if hasattr(self.source, 'fingerprint'):
+            parts.append(self.source.fingerprint())
+        return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+    def get_data_version(self):
+        """
+        Return dict with table declared data version and rows count of the filtered datasource.
+        Both values are fetched by one aggregate query, None is returned when it exceeds ``count_timeout``.
+        """
+        if self.table.data_version is None or self._count_exceeded:
+            return None
+        self.prepare_source()
+        try:
+            return self.aggregate_with_count(version=self.table.data_version,
+                                             count=Count(getattr(self.source, 'primary_key', None) or 'pk'))
+        except QueryTimeout:
+            self._count_exceeded = True
+            return None
+
+    def aggregate_with_count(self, **kwargs):
+        """
+        Run aggregate query which counts rows of the datasource within ``count_timeout`` seconds.
+        """
+        with time_limit(self.count_timeout, using=getattr(self.source, 'db', 'default')):
+            return self.source.aggregate(**kwargs)
+
+    def get_aggregate_expressions(self):
+        """
+        Return list of (column key, aggregate name, expression) declared by visible columns.
+        """
+        expressions = []
+        for key, column in self.iter_columns():
+            for name in column.aggregate:
+                expressions.append((key, name, AGGREGATE_FUNCTIONS[name](column.refname)))
+        return expressions
+
+    @property
+    def has_aggregates(self):
+        return any(column.aggregate for key, column in self.iter_columns())
+
+    def get_aggregates(self):
+        """
+        Return ``{column key: {aggregate name: value}}`` for the filtered datasource.
+        All aggregates and rows count are computed by one aggregate query and
+        optionally cached for ``Meta.aggregate_cache_timeout`` seconds.
+        Aggregates are empty when the query exceeds ``count_timeout``.
+        """
+        if self._aggregates is not None:
+            return self._aggregates
+
+        expressions = self.get_aggregate_expressions()
+        if not expressions or self._count_exceeded:
+            self._aggregates = {}
+            return self._aggregates
+
+        self.prepare_source()
+        cache_key = None
+        result = None
+        if self.table.aggregate_cache_timeout:
+            cache_key = 'sdh_table:%s:aggregates' % self.get_state_key()
+            result = get_cache().get(cache_key)
+
+        if result is None:
+            try:
+                result = self.aggregate_with_count(**self.get_aggregate_kwargs(expressions))
+            except QueryTimeout:
+                self._count_exceeded = True
+                self._aggregates = {}
+                return self._aggregates
+            if cache_key:
+                get_cache().set(cache_key, result, self.table.aggregate_cache_timeout)
+
+        if self.paginator and not self.is_group_paginated():
+            self.paginator.set_hits(result['sdh_count'])
+
+        self._aggregates = self.unpack_aggregates(expressions, result)
+        return self._aggregates
+
+    def get_aggregate_kwargs(self, expressions):
+        kwargs = {'sdh_aggregate_%d' % index: expression
+                  for index, (key, name, expression) in enumerate(expressions)}
+        kwargs['sdh_count'] = Count(getattr(self.source, 'primary_key', None) or 'pk')
+        return kwargs
+
+    @staticmethod
+    def unpack_aggregates(expressions, result):
+        aggregates = {}
+        for index, (key, name, expression) in enumerate(expressions):
+            aggregates.setdefault(key, {})[name] = result['sdh_aggregate_%d' % index]
+        return aggregates
+
+    def get_facet_counts(self):
+        """
+        Return ``{facet: {value: rows count}}`` for facet fields declared in ``Meta.facets``,
+        computed for the filtered datasource by one grouped query per facet and optionally
+        cached for ``Meta.aggregate_cache_timeout`` seconds.
+        """
+        if self._facet_counts is not None:
+            return self._facet_counts
+
+        if not self.table.facets:
+            self._facet_counts = {}
+            return self._facet_counts
+
+        if self._source_prepared:
+            source = self.source
+        else:
+            # filter form is processed before datasource is filtered, keep the source untouched
+            source = copy(self.source)
+            self.table.apply_filter(self.filter, source)
+            if self.search_value:
+                self.table.apply_search(self.search_value, source)
+
+        cache_key = None
+        if self.table.aggregate_cache_timeout:
+            cache_key = 'sdh_table:%s:facets' % self.get_state_key()
+            self._facet_counts = get_cache().get(cache_key)
+            if self._facet_counts is not None:
+                return self._facet_counts
+
+        pk_name = getattr(source, 'primary_key', None) or 'pk'
+        self._facet_counts = {}
+        for facet in self.table.facets:
+            rows = source.qs.order_by().values_list(facet).annotate(sdh_count=Count(pk_name))
+            self._facet_counts[facet] = {value: count for value, count in rows}
+
+        if cache_key:
+            get_cache().set(cache_key, self._facet_counts, self.table.aggregate_cache_timeout)
+        return self._facet_counts
+
+    def iter_footer(self):
+        aggregates = self.get_aggregates()
+        for key, column in self.iter_columns():
+            yield key, CellFooter(self, key, column, aggregates.get(key, {}))
+
+    def get_etag(self):
+        if self._etag is None:
+            data_version = self.get_data_version()
+            if data_version is None:
+                return None
+            if self.paginator and not self.is_group_paginated():
+                self.paginator.set_hits(data_version['count'])
+            parts = [self.get_state_key(),
+                     self.request.GET.get('page'),
+                     self.row_per_page,
+                     data_version['version'],
+                     data_version['count']]
+            self._etag = quote_etag(hashlib.md5(repr(parts).encode('utf-8')).hexdigest())
+        return self._etag
+
+    def is_not_modified(self):
+        if self.request.method not in ('GET', 'HEAD'):
+            return False
+        etag = self.get_etag()
+        if not etag:
+            return False
+        etags = parse_etags(self.request.META.get('HTTP_IF_NONE_MATCH', ''))
+        return etag in etags or '*' in etags
+
+    def not_modified_response(self):
+        response = HttpResponseNotModified()
+        self.patch_response(response)
+        return response
+
+    def patch_response(self, response):
+        """
+        Add table related headers to response rendered by view.
+        """
+        if self.table.data_version is not None and not response.has_header('ETag'):
+            etag = self.get_etag()
+            if etag:
+                response['ETag'] = etag
+        return self.add_server_timing(response)
+
+    def add_server_timing(self, response):
+        if self.timer.enabled and getattr(settings, 'SDH_TABLE_SERVER_TIMING', False):
+            server_timing = self.timer.server_timing()
+            if server_timing:
+                response['Server-Timing'] = server_timing
+        return response
 
+    def get_profile_lookup(self, profile_id=None):
+        """
+        Return field lookups of the profile to restore or None when no profile is needed.
+        """
         if profile_id is None and self.last_profile_key in self.request.session:
             profile_id = self.request.session[self.last_profile_key]
-        elif profile_id:
+        elif profile_id and self.request.session.get(self.last_profile_key) != profile_id:
             self.request.session[self.last_profile_key] = profile_id
 
-        profile_qs = TableViewProfile.objects.filter(tableview_name=self.table.id)
+        lookup = {'tableview_name': self.table.id}
         if self.table.global_profile:
-            profile_qs = profile_qs.filter(user__isnull=True)
+            lookup['user__isnull'] = True
         elif not fn_value(self.request.user.is_anonymous):
-            profile_qs = profile_qs.filter(user=self.request.user)
-            
+            lookup['user'] = self.request.user
+
         if profile_id == 'default' and self.request.user:
-            self.profile = get_object_or_none(
-                TableViewProfile,
-                tableview_name=self.table.id,
-                user=self.request.user,
-                is_default=True)
+            if fn_value(self.request.user.is_anonymous):
+                return None
+            return {'tableview_name': self.table.id,
+                    'user': self.request.user,
+                    'is_default': True}
         elif profile_id is None and self.session_key not in self.request.session:
             # load default state
-            self.profile = get_object_or_none(profile_qs,
-                                              is_default=True)
-
+            lookup['is_default'] = True
+            return lookup
         elif profile_id and profile_id.isdigit():
-            self.profile = get_object_or_none(profile_qs,
-                                              is_default=False,
-                                              pk=profile_id)
+            lookup['is_default'] = False
+            lookup['pk'] = int(profile_id)
+            return lookup
+        return None
+
+    @staticmethod
+    def match_profile(profile, lookup):
+        for key, value in lookup.items():
+            if key == 'user':
+                if profile.user_id != value.pk:
+                    return False
+            elif key == 'user__isnull':
+                if (profile.user_id is None) != value:
+                    return False
+            elif getattr(profile, key) != value:
+                return False
+        return True
+
+    def restore(self, profile_id=None, profiles=None):
+        """
+        Restore state from selected profile or session.
+        ``profiles`` is list of already fetched profiles to pick from, see ``restore_controllers``.
+        """
+        from .models import TableViewProfile
+        state = None
+
+        lookup = self.get_profile_lookup(profile_id)
+        if lookup is not None:
+            if profiles is None:
+                self.profile = get_object_or_none(TableViewProfile.primary_objects(), **lookup)
+            else:
+                self.profile = next((profile for profile in profiles if self.match_profile(profile, lookup)), None)
 
         if self.session_key in self.request.session:
-            state = self.request.session[self.session_key]
+            self._session_state = self.request.session[self.session_key]
+            state = self.unpack_state(self._session_state)
 
         if self.profile:
             state = self.profile.state
 
         if state:
             self.apply_state(state)
+        self.restored = True
+
+    def pack_state(self, state):
+        """
+        Return compact form of state for session: short keys, default values omitted.
+        """
+        packed = {}
+        if list(state['visible']) != list(self.table.get_default_visible):
+            packed['v'] = list(state['visible'])
+        if state['sort_by']:
+            packed['s'] = state['sort_by']
+        if state['filter']:
+            packed['f'] = deepcopy(state['filter'])
+        return packed
+
+    def unpack_state(self, data):
+        # copy, so changes of restored state are not applied to the session data it is compared with
+        data = deepcopy(data)
+        if not data or 'visible' in data or 'sort_by' in data or 'filter' in data:
+            # full state saved by previous versions
+            return data
+        return {'visible': data.get('v', list(self.table.get_default_visible)),
+                'sort_by': data.get('s'),
+                'filter': data.get('f', {})}
 
     def save(self):
-        self.request.session["tableview_%s" % self.table.id] = self.get_state()
+        """
+        Save state into session if it was changed since restore.
+        """
+        packed = self.pack_state(self.get_state())
+        if packed != self._session_state or self.session_key not in self.request.session:
+            self.request.session[self.session_key] = packed
+            self._session_state = packed
 
     def save_state(self, name=None):
         from .models import TableViewProfile
@@ -188,7 +690,7 @@ class TableController:
             kwargs['is_default'] = False
             kwargs['label'] = name
 
-        profile, created = TableViewProfile.objects.get_or_create(**kwargs)
+        profile, created = TableViewProfile.primary_objects().get_or_create(**kwargs)
 
         if not created:
             profile.dump = dump
@@ -201,10 +703,10 @@ class TableController:
     def remove_profile(self, profile_id):
         from .models import TableViewProfile
 
-        qs = TableViewProfile.objects.filter(id=profile_id,
-                                             tableview_name=self.table.id,
-                                             is_default=False
-                                             )
+        qs = TableViewProfile.primary_objects().filter(id=profile_id,
+                                                       tableview_name=self.table.id,
+                                                       is_default=False
+                                                       )
         if self.table.global_profile:
             qs = qs.filter(user__isnull=True)
         else:
@@ -217,7 +719,19 @@ class TableController:
         return any(self.get_state()['filter'].values())
 
     def process_request(self, **kwargs):
-        self.restore(self.request.GET.get('profile'))
+        if not self.restored:
+            with self.timer.phase('restore'):
+                self.restore(self.request.GET.get('profile'))
+
+        response = self._process_request()
+        if isinstance(response, HttpResponse):
+            self.add_server_timing(response)
+        return response
+
+    def _process_request(self):
+        if self.push_enabled and self.request.GET.get('action') == 'stream':
+            # EventSource can not send X-Requested-With header
+            return self.stream()
 
         if self.request.META.get('HTTP_X_REQUESTED_WITH') == 'XMLHttpRequest':
             if self.request.GET.get('action') == 'save_state':
@@ -239,23 +753,22 @@ class TableController:
             if self.request.GET.get('action') == 'load_page':
                 self.process_form_filter()
 
-                self.table.apply_filter(self.filter, self.source)
+                self.prepare_source()
 
-                if self.paginator:
-                    self.paginator.calc()
+                if self.is_not_modified():
+                    return self.not_modified_response()
 
-                return JsonResponse(
-                    {'page_count': self.paginator.get_page_count(),
-                     'body': render_to_string(self.table.template_body_content,
-                                              self.get_template_context(),
-                                              self.request),
-                     'paginator': render_to_string(self.table.template_paginator,
-                                                   self.get_template_context(),
-                                                   self.request)})
+                return self.patch_response(JsonResponse(self.get_page_data()))
+
+            if self.request.GET.get('action') == 'load_delta':
+                return self.load_delta()
+
+            if self.request.GET.get('action') == 'load_rows':
+                return self.load_rows()
 
         if 'search' in self.request.GET:
             self.apply_search(self.request.GET['search'])
-            self.table.apply_filter(self.filter, self.source)
+            self.prepare_source()
 
         rc = self.process_form_filter()
 
@@ -280,8 +793,20 @@ class TableController:
         if rc:
             return rc
 
+        if self.table.conditional_page and self.is_not_modified():
+            return self.not_modified_response()
+
     def download_csv(self, request):
+        with self.timer.phase('csv'):
+            return self._download_csv(request)
+
+    def _download_csv(self, request):
         self.paginator = None
+        for key, column in self.iter_columns():
+            self.annotate_column(key, column)
+        if self.table.group_by and not self._source_prepared:
+            # keep rows of a group together, group rows are not exported
+            self.source.set_group(self.get_group_ref())
         # Create the HttpResponse object with the appropriate CSV header.
         response = HttpResponse(content_type='text/csv', charset='utf-8')
         response['Content-Disposition'] = 'attachment; filename=%s_%s.csv' % (
@@ -290,14 +815,216 @@ class TableController:
 
         writer = csv.writer(response)
         writer.writerow([cell.html_title() for key, cell in self.iter_title()])
-        for row in self.get_paginated_rows():
+        for row in self.get_paginated_rows(group_rows=False):
             writer.writerow([cell.as_csv() for cell in row])
         return response
 
+    def get_page_data(self):
+        """
+        Return rendered body and paginator of the current page, used by ``load_page`` and ``stream``.
+        """
+        self.calc_paginator()
+        self.fetch_page()
+        return {'page_count': self.paginator.get_page_count(),
+                'count_unknown': self.count_unknown,
+                'body': render_to_string(self.table.template_body_content,
+                                         self.get_template_context(),
+                                         self.request),
+                'paginator': render_to_string(self.table.template_paginator,
+                                              self.get_template_context(),
+                                              self.request)}
+
+    def reset(self):
+        """
+        Forget query results kept by controller, so the page is read again on next render.
+        Paginator is created again, so ``LazyPaginator`` set after count timeout is replaced
+        by the configured one, and snapshot of primary keys is fetched again.
+        """
+        self._etag = None
+        self._aggregates = None
+        self._facet_counts = None
+        self._page_rows = None
+        self.count_unknown = False
+        self._count_exceeded = False
+        self.refresh_snapshot = True
+        if self.paginator:
+            self._init_paginator()
+
+    def get_update(self, version=None):
+        """
+        Return (version, page data) of the current page read again, page data is None
+        when page version equals ``version``. Version is ETag when ``Meta.data_version``
+        is declared, otherwise hash of rendered page.
+        """
+        self.reset()
+        etag = self.get_etag()
+        if etag and etag == version:
+            return version, None
+        data = self.get_page_data()
+        if not etag:
+            etag = hashlib.md5(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+            if etag == version:
+                return version, None
+        return etag, data
+
+    def stream(self):
+        """
+        Return Server-Sent Events response which sends ``update`` event with page data
+        each time instances of datasource model are changed and the page differs.
+        Enabled by ``Meta.push`` or ``SDH_TABLE_PUSH`` setting, requires ASGI server
+        and Django 4.2 or later, which stream asynchronous responses without collecting them.
+        """
+        if not isinstance(self.request, ASGIRequest) or DJANGO_VERSION < (4, 2):
+            return JsonResponse({'status': 'ERROR', 'message': 'Push requires ASGI server'}, status=400)
+
+        model = getattr(getattr(self.source, 'qs', None), 'model', None)
+        if model is None:
+            return JsonResponse({'status': 'ERROR', 'message': 'Datasource does not support push'}, status=400)
+
+        self.process_form_filter()
+        self.prepare_source()
+        push.watch(model)
+
+        response = StreamingHttpResponse(self.iter_events(push.get_channel(model)),
+                                         content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def iter_events(self, channel):
+        subscription = push.get_broker().subscribe(channel)
+        keepalive = getattr(settings, 'SDH_TABLE_PUSH_KEEPALIVE', 15)
+        try:
+            version, data = await sync_to_async(self.get_update)()
+            while True:
+                try:
+                    await subscription.get(keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                version, data = await sync_to_async(self.get_update)(version)
+                if data is not None:
+                    yield 'event: update\ndata: %s\n\n' % json.dumps(data)
+        finally:
+            subscription.close()
+
+    def load_delta(self):
+        """
+        Return rows of the current page changed since client's version.
+
+        Client sends ``version`` it has seen last time and ``rows`` - comma separated
+        primary keys of the rows it displays. Response contains new version, primary keys
+        order of the page, rendered rows which are new or changed and removed primary keys.
+        """
+        version_field = self.table.version_field
+        if not version_field:
+            return JsonResponse({'status': 'ERROR', 'message': 'Meta.version_field is not defined'}, status=400)
+        if not hasattr(self.source, 'qs'):
+            return JsonResponse({'status': 'ERROR', 'message': 'Datasource does not support delta'}, status=400)
+
+        self.process_form_filter()
+        self.prepare_source()
+
+        pk_name = self.source.primary_key or 'pk'
+        page_qs = self.source.qs.values_list(pk_name, version_field)
+        if self.paginator:
+            self.calc_paginator()
+            start, end = self.paginator.get_offset()
+            page_qs = page_qs[start:end]
+        page = list(page_qs)
+
+        since = self.request.GET.get('version') or None
+        if since:
+            field = self.source.qs.model._meta.get_field(version_field)
+            try:
+                since = field.to_python(since)
+            except ValidationError:
+                since = None
+        client_rows = set(filter(None, self.request.GET.get('rows', '').split(',')))
+
+        changed = []
+        version = since
+        for pk, row_version in page:
+            if row_version is not None and (version is None or row_version > version):
+                version = row_version
+            if str(pk) not in client_rows or since is None or row_version is None or row_version > since:
+                changed.append(pk)
+
+        order = [pk for pk, row_version in page]
+        page_pks = set(str(pk) for pk in order)
+        rows = []
+        if changed:
+            row_indexes = {pk: index for index, pk in enumerate(order, 1)}
+            context = self.get_template_context()
+            for row in self.source.fetch_by_pk(changed):
+                pk = self.source.get_row_pk(row)
+                context['row'] = BoundRow(self, row_indexes[pk], row)
+                rows.append({'id': pk,
+                             'html': render_to_string(self.table.template_row, context, self.request)})
+
+        if isinstance(version, (datetime, date)):
+            # keep full precision, DjangoJSONEncoder truncates microseconds
+            version = version.isoformat()
+
+        return JsonResponse({'version': version,
+                             'page_count': self.paginator.get_page_count() if self.paginator else 1,
+                             'order': order,
+                             'rows': rows,
+                             'removed': [pk for pk in client_rows if pk not in page_pks]})
+
+    def load_rows(self):
+        """
+        Return window of rows as columnar JSON for client side virtual scrolling.
+
+        GET parameters: ``offset`` of the first row, ``limit`` of rows (up to ``Meta.json_rows_limit``),
+        ``search`` value and ``total=1`` to include rows count. Filter and sort are taken from table state.
+        """
+        offset = max(atoi(self.request.GET.get('offset'), 0), 0)
+        limit = min(max(atoi(self.request.GET.get('limit'), self.table.json_rows_limit), 1),
+                    self.table.json_rows_limit)
+
+        if 'search' in self.request.GET:
+            self.apply_search(self.request.GET['search'])
+        self.prepare_source()
+
+        rows = list(self.source[offset:offset + limit + 1])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        columns = [key for key, column in self.iter_columns()]
+        data = {'columns': columns,
+                'offset': offset,
+                'next': offset + limit if has_next else None,
+                'ids': [],
+                'rows': []}
+        for row_index, row in enumerate(rows, offset + 1):
+            bound_row = BoundRow(self, row_index, row)
+            data['ids'].append(bound_row.get_pk())
+            data['rows'].append([self.json_value(cell.to_python()) for cell in bound_row])
+
+        if self.request.GET.get('total'):
+            data['total'] = self.source.count()
+        return JsonResponse(data)
+
+    @classmethod
+    def json_value(cls, value):
+        """
+        Convert cell value into something DjangoJSONEncoder can serialize.
+        """
+        if value is None or isinstance(value, (bool, int, float, str, Decimal, date, time, UUID)):
+            return value
+        if isinstance(value, (list, tuple, set, QuerySet)):
+            return [cls.json_value(item) for item in value]
+        return str(value)
+
     def process_form_filter(self):
         if not self.table.filter_form:
             return
 
+        with self.timer.phase('filter_form'):
+            return self._process_form_filter()
+
+    def _process_form_filter(self):
         if getattr(self.table.filter_form, 'has_queryset', False):
             params = {
                 'queryset': self.source._clone()
@@ -305,15 +1032,21 @@ class TableController:
         else:
             params = {}
 
+        is_reset = self.request.method == 'POST' and 'form_filter_reset' in self.request.POST
+        if is_reset:
+            self.filter = {}
+
+        if getattr(self.table.filter_form, 'has_facets', False):
+            params['facet_counts'] = self.get_facet_counts()
+
         if self.request.method == 'POST' and 'form_filter' in self.request.POST:
             form = self.table.filter_form(self.request.POST, request=self.request, **params)
             if form.is_valid():
                 self.filter = form.cleaned_data
                 self.save()
                 return HttpResponseRedirect("?profile=custom")
-        elif self.request.method == 'POST' and 'form_filter_reset' in self.request.POST:
+        elif is_reset:
             form = self.table.filter_form(None, initial={}, request=self.request, **params)
-            self.filter = {}
         else:
             form = self.table.filter_form(request=self.request, initial=self.filter, **params)
 
@@ -330,21 +1063,21 @@ class TableController:
         from .models import TableViewProfile
 
         if self.table.global_profile:
-            return TableViewProfile.objects.filter(user__isnull=True,
-                                                   tableview_name=self.table.id,
-                                                   is_default=False).order_by('label')
+            return TableViewProfile.primary_objects().filter(user__isnull=True,
+                                                             tableview_name=self.table.id,
+                                                             is_default=False).defer('dump').order_by('label')
         else:
-            return TableViewProfile.objects.filter(user=self.request.user,
-                                                   tableview_name=self.table.id,
-                                                   is_default=False).order_by('label')
+            return TableViewProfile.primary_objects().filter(user=self.request.user,
+                                                             tableview_name=self.table.id,
+                                                             is_default=False).defer('dump').order_by('label')
 
     def iter_columns(self):
-        for key, column in self.table.columns.items():
+        for key, column in self.table.columns.shared_items():
             if key in self.table.get_permanent or key in self.visible_columns:
                 yield key, column
 
     def iter_all_columns(self):
-        for key, column in self.table.columns.items():
+        for key, column in self.table.columns.shared_items():
             yield key, column
 
     def iter_all_title(self):
@@ -366,12 +1099,29 @@ class TableController:
         return kwargs
 
     def as_html(self):
-        if self.search_value:
-            self.table.apply_search(self.search_value, self.source)
-        else:
-            self.table.apply_filter(self.filter, self.source)
-
-        if self.paginator:
-            self.paginator.calc()
-
-        return render_to_string(self.table.template, self.get_template_context(), self.request)
+        self.prepare_source()
+        if self.has_aggregates:
+            # rows count is computed by the same query
+            self.get_aggregates()
+        self.calc_paginator()
+        self.fetch_page()
+
+        with self.timer.phase('render'):
+            return render_to_string(self.table.template, self.get_template_context(), self.request)
+
+
+def restore_controllers(controllers):
+    """
+    Restore state of several table controllers of one page (e.g. dashboard)
+    with a single profile query. ``process_request`` of restored controllers
+    does not query profiles again.
+    """
+    from .models import TableViewProfile
+
+    lookups = [controller.get_profile_lookup(controller.request.GET.get('profile')) for controller in controllers]
+    queries = [Q(**lookup) for lookup in lookups if lookup is not None]
+    profiles = list(TableViewProfile.primary_objects().filter(reduce(operator.or_, queries))) if queries else []
+
+    for controller in controllers:
+        with controller.timer.phase('restore'):
+            controller.restore(controller.request.GET.get('profile'), profiles=profiles)
@@ -1,4 +1,7 @@
 from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db.models import F, Q
+from django.db.models.constants import LOOKUP_SEP
 
 
 class BaseDatasource(object):
@@ -34,6 +37,10 @@ class QSDataSource(BaseDatasource):
     def __item__(self, key):
         pass
 
+    @property
+    def db(self):
+        return self.qs.db
+
     def set_order(self, order_ref, asc):
         order_refs = [order_ref]
         if self.primary_key:
@@ -52,10 +59,91 @@ class QSDataSource(BaseDatasource):
         except AttributeError:
             return len(list(self.qs))
 
+    def annotate(self, *args, **kwargs):
+        self.qs = self.qs.annotate(*args, **kwargs)
+        return self
+
     def filter(self, *kargs, **kwargs):
         self.qs = self.qs.filter(*kargs, **kwargs)
         return self
 
+    def using(self, alias):
+        """
+        Run count, page, export and aggregate queries on given database alias, e.g. read replica.
+        """
+        self.qs = self.qs.using(alias)
+        return self
+
+    def fetch_pks(self, start, end):
+        return list(self.qs.values_list(self.primary_key or 'pk', flat=True)[start:end])
+
+    def fetch_by_pk(self, pks):
+        """
+        Return list of rows with given primary keys in the same order as ``pks``.
+        """
+        pk_name = self.primary_key or 'pk'
+        rows = {self.get_row_pk(row): row for row in self.qs.filter(**{'%s__in' % pk_name: pks})}
+        return [rows[pk] for pk in pks if pk in rows]
+
+    def get_row_pk(self, row):
+        """
+        Return value of ``primary_key`` of the row.
+        """
+        value = row
+        for part in (self.primary_key or 'pk').split(LOOKUP_SEP):
+            if value is None:
+                break
+            value = getattr(value, part)
+        return value
+
+    def aggregate(self, *args, **kwargs):
+        return self.qs.aggregate(*args, **kwargs)
+
+    def fingerprint(self):
+        """
+        Return text which identifies the query of datasource, used to build cache keys.
+        """
+        try:
+            sql, params = self.qs.query.sql_with_params()
+        except EmptyResultSet:
+            return '%s:empty' % self.qs.model._meta.label_lower
+        return '%s:%s:%r' % (self.qs.db, sql, params)
+
+    def set_group(self, group_ref):
+        """
+        Annotate rows with ``sdh_group`` key and order by it ahead of the current ordering,
+        so rows of the same group come one after another.
+        """
+        query = self.qs.query
+        ordering = list(query.order_by) or list(query.get_meta().ordering if query.default_ordering else [])
+        self.qs = self.qs.annotate(sdh_group=F(group_ref)).order_by('sdh_group', *ordering)
+        return self
+
+    def group_keys(self):
+        """
+        Return queryset of distinct ordered group keys, used to paginate by groups.
+        """
+        return self.qs.order_by('sdh_group').values_list('sdh_group', flat=True).distinct()
+
+    def group_filter(self, keys):
+        """
+        Return datasource queryset restricted to rows of given group keys.
+        """
+        keys = list(keys)
+        condition = Q(sdh_group__in=[key for key in keys if key is not None])
+        if None in keys:
+            condition |= Q(sdh_group__isnull=True)
+        return self.qs.filter(condition)
+
+    def aggregate_groups(self, keys, **kwargs):
+        """
+        Return ``{group key: aggregates}`` for given group keys, or all groups when keys is None,
+        by one grouped query.
+        """
+        qs = self.qs if keys is None else self.group_filter(keys)
+        rows = qs.order_by().values('sdh_group').annotate(**kwargs)
+        return {row.pop('sdh_group'): row for row in rows}
+
     def distinct(self, base):
         if settings.DATABASES[self.qs.db]["ENGINE"] == "django.db.backends.oracle":
             # distinct analogue for Oracle users
@@ -77,3 +165,24 @@ class QSDataSource(BaseDatasource):
             return self.qs.clone()
         else:
             return self.qs.all(*args, **kwargs)
+
+
+class SnapshotDataSource(BaseDatasource):
+    """
+    Datasource which serves rows by materialized ordered list of primary keys
+    of another datasource, so count and slicing do not run the original query.
+    """
+    def __init__(self, source, pks):
+        self.source = source
+        self.pks = pks
+
+    def __iter__(self):
+        return iter(self.source.fetch_by_pk(self.pks))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return self.source.fetch_by_pk(self.pks[item])
+        raise KeyError
+
+    def count(self):
+        return len(self.pks)
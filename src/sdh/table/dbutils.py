@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, transaction
+
+
+class QueryTimeout(DatabaseError):
+    """ Query was cancelled because it exceeded its time budget """
+
+
+@contextmanager
+def time_limit(seconds, using='default'):
+    """ Cancel queries run inside the block after ``seconds`` and raise ``QueryTimeout``.
+
+        Uses ``statement_timeout`` on PostgreSQL, ``max_execution_time`` on MySQL
+        and a progress handler on SQLite. Other backends run without a limit.
+    """
+    if not seconds:
+        yield
+        return
+
+    connection = connections[using]
+    handler = _LIMITS.get(connection.vendor)
+    if handler is None:
+        yield
+        return
+
+    deadline = time.monotonic() + seconds
+    try:
+        with handler(connection, seconds, deadline):
+            yield
+    except DatabaseError as e:
+        if isinstance(e, QueryTimeout) or time.monotonic() < deadline:
+            raise
+        raise QueryTimeout('Query exceeded time limit of %s seconds' % seconds) from e
+
+
+@contextmanager
+def _sqlite_limit(connection, seconds, deadline):
+    connection.ensure_connection()
+    connection.connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+    try:
+        yield
+    finally:
+        connection.connection.set_progress_handler(None, 1000)
+
+
+@contextmanager
+def _postgresql_limit(connection, seconds, deadline):
+    # SET LOCAL is reverted together with the transaction (savepoint)
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL statement_timeout = %s', [int(seconds * 1000)])
+        yield
+
+
+@contextmanager
+def _mysql_limit(connection, seconds, deadline):
+    with connection.cursor() as cursor:
+        cursor.execute('SET SESSION max_execution_time = %s', [int(seconds * 1000)])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SET SESSION max_execution_time = 0')
+
+
+_LIMITS = {
+    'sqlite': _sqlite_limit,
+    'postgresql': _postgresql_limit,
+    'mysql': _mysql_limit,
+}
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """ Return shared thread pool of ``SDH_TABLE_WORKERS`` threads used to run queries concurrently """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'SDH_TABLE_WORKERS', 4),
+                                           thread_name_prefix='sdh-table')
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """ Run ``fn`` in the shared thread pool on the thread own database connections.
+        Connections of worker threads are kept open and closed by ``CONN_MAX_AGE`` like
+        connections of request threads.
+    """
+    return get_executor().submit(_run_with_connections, fn, *args, **kwargs)
+
+
+def persistent_connections(using='default'):
+    """ Return True when ``CONN_MAX_AGE`` keeps connections of the database open between tasks """
+    return connections[using].settings_dict.get('CONN_MAX_AGE', 0) != 0
+
+
+def _run_with_connections(fn, *args, **kwargs):
+    close_old_connections()
+    return fn(*args, **kwargs)
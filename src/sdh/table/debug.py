@@ -0,0 +1,142 @@
+import logging
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager, nullcontext
+
+from django.db import connections
+
+logger = logging.getLogger('sdh.table')
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+class NullQueryDetector:
+    """
+    Detector used when query detection is disabled.
+    """
+    enabled = False
+    _null = nullcontext()
+
+    def capture(self):
+        return self._null
+
+    def column(self, key):
+        return self._null
+
+    def set_row(self, row_index):
+        pass
+
+    def check(self):
+        pass
+
+
+NULL_DETECTOR = NullQueryDetector()
+
+
+class QueryDetector:
+    """
+    Count queries issued while rendering table rows, per row and per column.
+
+    Column is reported when number of its queries grows with number of rendered rows,
+    which usually means relation traversal or ``condition`` callback without
+    ``select_related``/``prefetch_related`` on the datasource.
+
+    ``mode`` is ``'raise'`` to raise ``NPlusOneError`` or ``'log'`` to log a warning.
+    """
+    enabled = True
+
+    def __init__(self, controller, mode='raise', min_rows=2):
+        self.controller = controller
+        self.mode = mode
+        self.min_rows = min_rows
+        self.current_row = None
+        self.current_column = None
+        self.rows = OrderedDict()
+        self.columns = OrderedDict()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.current_row is not None:
+            self.rows[self.current_row] = self.rows.get(self.current_row, 0) + 1
+            column = self.current_column
+            self.columns[column] = self.columns.get(column, 0) + 1
+            self.samples.setdefault(column, sql)
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def capture(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @contextmanager
+    def column(self, key):
+        previous = self.current_column
+        self.current_column = key
+        try:
+            yield
+        finally:
+            self.current_column = previous
+
+    def set_row(self, row_index):
+        self.current_row = row_index
+        self.rows.setdefault(row_index, 0)
+
+    def report(self):
+        """
+        Return list of problems as dicts with ``column``, ``refname``, ``queries``, ``rows`` and ``sql``.
+        """
+        rows_count = len(self.rows)
+        if rows_count < self.min_rows:
+            return []
+
+        problems = []
+        for key, queries in self.columns.items():
+            if queries < rows_count:
+                continue
+            column = self.controller.table.columns.get(key) if key else None
+            problems.append({'column': key,
+                             'refname': getattr(column, 'refname', None),
+                             'queries': queries,
+                             'rows': rows_count,
+                             'sql': self.samples.get(key)})
+        return problems
+
+    def format_report(self, problems):
+        lines = ['Table "%s" issues queries per row:' % self.controller.table.id]
+        for problem in problems:
+            if problem['column'] is None:
+                lines.append('  row rendering: %(queries)d queries for %(rows)d rows, e.g. %(sql)s' % problem)
+            else:
+                lines.append('  column "%(column)s" (refname "%(refname)s"): '
+                             '%(queries)d queries for %(rows)d rows, e.g. %(sql)s' % problem)
+        return '\n'.join(lines)
+
+    def check(self):
+        problems = self.report()
+        if not problems:
+            return
+        message = self.format_report(problems)
+        if self.mode == 'raise':
+            raise NPlusOneError(message)
+        logger.warning(message)
+
+
+def assert_no_n_plus_one(controller):
+    """
+    Test helper: render all rows of the controller and fail if any column
+    issues queries proportional to the number of rows.
+    """
+    previous, controller.query_detector_mode = controller.query_detector_mode, 'raise'
+    try:
+        for row in controller.get_paginated_rows():
+            for cell in row:
+                cell.get_cell_class()
+                cell.get_cell_style()
+                cell.as_html()
+    except NPlusOneError as e:
+        raise AssertionError(str(e))
+    finally:
+        controller.query_detector_mode = previous
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from sdh.table.table import table_registry
+from sdh.table.warmup import autodiscover, warmup_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that templates of all registered tables load and column refnames "
+        "resolve against Meta.model. Template cache of this command process is "
+        "discarded on exit, serving processes are warmed up by SDH_TABLE_WARMUP setting."
+    )
+
+    def handle(self, *args, **options):
+        autodiscover()
+        tables = list(table_registry)
+        errors = []
+        for table_class in tables:
+            table_errors, table_warnings = warmup_table(table_class)
+            for warning in table_warnings:
+                self.stdout.write(self.style.WARNING(warning))
+            for error in table_errors:
+                self.stdout.write(self.style.ERROR(error))
+            errors.extend(table_errors)
+        self.stdout.write(f'Checked {len(tables)} tables.')
+        if errors:
+            raise CommandError(f'{len(errors)} errors found.')
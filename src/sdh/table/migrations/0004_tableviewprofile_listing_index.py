@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("table", "0003_add_constraint"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="tableviewprofile",
+            index=models.Index(
+                fields=["tableview_name", "user", "is_default", "label", "id"],
+                name="tableview_profile_listing_idx"
+            ),
+        ),
+    ]
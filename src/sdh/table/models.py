@@ -1,7 +1,7 @@
 import pickle
 import codecs
 
-from django.db import models
+from django.db import models, router
 from django.conf import settings
 
 
@@ -27,6 +27,11 @@ class TableViewProfile(models.Model):
                 name='unique_default_per_user_tableview'
             )
         ]
+        indexes = [
+            # covers profile listings: filtered by table, user and is_default, ordered by label
+            models.Index(fields=['tableview_name', 'user', 'is_default', 'label', 'id'],
+                         name='tableview_profile_listing_idx'),
+        ]
 
     @property
     def state(self):
@@ -47,6 +52,14 @@ class TableViewProfile(models.Model):
         except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError, UnicodeDecodeError):
             pass
 
+    @classmethod
+    def primary_objects(cls):
+        """
+        Manager bound to the database profiles are written to, so a profile is not
+        read from a lagging replica right after it was saved.
+        """
+        return cls.objects.db_manager(router.db_for_write(cls))
+
     @classmethod
     def dump_state(cls, data):
         dump = pickle.dumps(data, cls.PICKLE_PROTOCOL)
@@ -3,7 +3,9 @@ import math
 from django.conf import settings
 from django.http import Http404
 
-from .shortcuts import atoi
+from .dbutils import persistent_connections, submit, time_limit
+from .shortcuts import atoi, get_cache
+from .timing import NULL_TIMER
 
 """
 Typical template example
@@ -61,6 +63,14 @@ class Paginator(object):
         self._page = None
         self.row_per_page = row_per_page or settings.PAGINATOR_PER_PAGE
         self._hits = 0
+        self._known_hits = None
+        self.prefetch_pages = 0
+        self.prefetch_timeout = None
+        self.cache_key = None
+        self.count_timeout = None
+        self.concurrent = False
+        self._items = None
+        self.timer = NULL_TIMER
 
         if page is not None or request is not None and self.row_per_page != 'all':
             if not skip_startup_recalc:
@@ -71,10 +81,9 @@ class Paginator(object):
             page = self.request.GET['page']
         self._page = atoi(page, 1)
 
-        if isinstance(self._queryset, list):
-            self._hits = len(self._queryset)
-        else:
-            self._hits = int(self._queryset.count())
+        future = self._submit_fetch()
+        with self.timer.phase('count'):
+            self._count()
 
         self._pages = int(math.ceil(float(self._hits) / float(self.row_per_page)))
         if not self._pages:
@@ -83,6 +92,91 @@ class Paginator(object):
         if self._page < 1 or self._page > self._pages:
             raise Http404
 
+        if future is not None:
+            self._items = (self._page, future.result())
+
+    def _submit_fetch(self):
+        """ Start fetching rows of the current page in a worker thread, so it runs
+            concurrently with the count query on a separate connection.
+            Rows are fetched sequentially when connections are not persistent, because
+            connecting for every page costs more than the concurrent count saves.
+        """
+        if not self.concurrent or self.row_per_page == 'all' or self._page < 1:
+            return None
+        if self._known_hits is not None or self.is_prefetch or not hasattr(self._queryset, 'db'):
+            return None
+        if not persistent_connections(self._queryset.db):
+            return None
+        start, end = self.get_offset()
+        return submit(list, self._queryset[start:end])
+
+    def _count(self):
+        if isinstance(self._queryset, list):
+            self._hits = len(self._queryset)
+        elif self._known_hits is not None:
+            self._hits = self._known_hits
+        elif self.is_prefetch:
+            key = '%s:hits' % self.cache_key
+            self._hits = get_cache().get(key)
+            if self._hits is None:
+                self._hits = self._count_queryset()
+                get_cache().set(key, self._hits, self.prefetch_timeout)
+        else:
+            self._hits = self._count_queryset()
+
+    def _count_queryset(self):
+        """ Count rows within ``count_timeout`` seconds, ``QueryTimeout`` is raised when it is exceeded """
+        with time_limit(self.count_timeout, using=getattr(self._queryset, 'db', 'default')):
+            return int(self._queryset.count())
+
+    def enable_prefetch(self, cache_key, pages=1, timeout=60):
+        """ Fetch primary keys of the next ``pages`` pages together with current one
+            and keep them in cache under ``cache_key`` for ``timeout`` seconds.
+            Next page is loaded then with a single ``pk__in`` query.
+        """
+        self.cache_key = 'sdh_table:%s:%s' % (cache_key, self.row_per_page)
+        self.prefetch_pages = pages
+        self.prefetch_timeout = timeout
+
+    @property
+    def is_prefetch(self):
+        return bool(self.prefetch_pages and self.cache_key and self.row_per_page != 'all'
+                    and hasattr(self._queryset, 'fetch_pks'))
+
+    def get_page_pks(self, page, extra=0):
+        """ Return primary keys of the ``page`` rows (plus ``extra`` rows of next page)
+            from cache, on cache miss fetch them for the next ``prefetch_pages`` pages too.
+        """
+        cache = get_cache()
+        key = '%s:%s:%s' % (self.cache_key, extra, page)
+        pks = cache.get(key)
+        if pks is not None:
+            return pks
+
+        row_per_page = atoi(self.row_per_page, 1)
+        start = (page - 1) * row_per_page
+        end = start + (self.prefetch_pages + 1) * row_per_page + extra
+        window = self._queryset.fetch_pks(start, end)
+
+        pages = {}
+        for index in range(self.prefetch_pages + 1):
+            page_pks = window[index * row_per_page:(index + 1) * row_per_page + extra]
+            if index and not page_pks:
+                break
+            pages['%s:%s:%s' % (self.cache_key, extra, page + index)] = page_pks
+        cache.set_many(pages, self.prefetch_timeout)
+        return pages[key]
+
+    def set_queryset(self, queryset):
+        self._queryset = queryset
+        # rows count known for previous queryset does not apply to the new one
+        self._known_hits = None
+        self._items = None
+
+    def set_hits(self, hits):
+        """ Use already known rows count instead of count query in ``calc`` """
+        self._known_hits = hits
+
     @property
     def page(self):
         if self._page is None:
@@ -122,6 +216,12 @@ class Paginator(object):
         if self.row_per_page == 'all':
             return self._queryset
 
+        if self._items is not None and self._items[0] == self.page:
+            return self._items[1]
+
+        if self.is_prefetch:
+            return self._queryset.fetch_by_pk(self.get_page_pks(self.page))
+
         start, end = self.get_offset()
         return self._queryset[start:end]
 
@@ -227,6 +327,13 @@ class LazyPaginator(Paginator):
         return self._rows
 
     def _fetch_rows(self):
+        with self.timer.phase('fetch'):
+            self._do_fetch_rows()
+
+    def _do_fetch_rows(self):
+        if self.is_prefetch:
+            self._rows = self._queryset.fetch_by_pk(self.get_page_pks(self._page, extra=1))
+            return
         start, end = self.get_offset()
         self._rows = list(self._queryset[start:end + 1])
 
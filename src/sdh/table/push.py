@@ -0,0 +1,123 @@
+"""
+Server push of table updates.
+
+Controller ``stream`` action (``?action=stream``) answers with Server-Sent Events
+stream, it is enabled by ``Meta.push`` of the table or ``SDH_TABLE_PUSH`` setting for
+all tables and requires ASGI server and Django 4.2. The stream subscribes to the broker
+channel of the datasource model, model changes are published to the channel on transaction
+commit, then the subscribed controller re-renders its page and sends it when it has changed.
+
+Broker is configured by ``SDH_TABLE_PUSH_BROKER`` setting, default ``LocalBroker``
+delivers messages within one process only. With ``SDH_TABLE_PUSH`` setting enabled
+changes of ``Meta.model`` of all tables are published by every process from startup,
+so streams get changes made by other web or worker processes through shared broker.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """ Messages of one channel received by one stream """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    def put(self, message):
+        """ Called by broker, possibly from another thread """
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+
+    async def get(self, timeout=None):
+        """ Wait for a message, messages queued meanwhile are collapsed into one.
+            Raise ``asyncio.TimeoutError`` after ``timeout`` seconds.
+        """
+        message = await asyncio.wait_for(self.queue.get(), timeout)
+        while not self.queue.empty():
+            message = self.queue.get_nowait()
+        return message
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """ Interface of push brokers """
+
+    def subscribe(self, channel):
+        """ Return ``Subscription`` to messages of channel, must be called within event loop """
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+
+class LocalBroker(Broker):
+    """ In-process broker """
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            self.subscriptions.get(subscription.channel, set()).discard(subscription)
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(getattr(settings, 'SDH_TABLE_PUSH_BROKER', 'sdh.table.push.LocalBroker'))()
+    return _broker
+
+
+def get_channel(model):
+    return 'sdh_table:%s' % model._meta.label_lower
+
+
+def _publish_change(sender, instance, **kwargs):
+    channel = get_channel(sender)
+    message = {'pk': instance.pk}
+    transaction.on_commit(lambda: get_broker().publish(channel, message), using=kwargs.get('using'))
+
+
+def watch_tables():
+    """ Watch ``Meta.model`` of all registered tables """
+    from .table import table_registry
+
+    for table_class in list(table_registry):
+        if table_class.model is not None:
+            watch(table_class.model)
+
+
+def watch(model):
+    """ Publish saved and deleted instances of model to its channel, safe to call several times """
+    uid = 'sdh_table_push:%s' % model._meta.label_lower
+    post_save.connect(_publish_change, sender=model, dispatch_uid=uid, weak=False)
+    post_delete.connect(_publish_change, sender=model, dispatch_uid=uid, weak=False)
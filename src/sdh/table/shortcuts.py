@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
 from django.shortcuts import _get_queryset
 
 
@@ -23,3 +25,5 @@ def fn_value(method_or_property):
     return method_or_property
 
 
+def get_cache():
+    return caches[getattr(settings, 'SDH_TABLE_CACHE', DEFAULT_CACHE_ALIAS)]
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent when table controller finished a timed phase (restore, filter_form, count,
+# fetch, render, csv). Arguments: controller, phase, duration (seconds).
+table_phase_finished = Signal()
@@ -1,18 +1,28 @@
 import re
 import csv
+import inspect
 import operator
-from copy import deepcopy
+from copy import copy
 from functools import reduce
 from collections import OrderedDict
+from weakref import WeakSet
 
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, models
 from django.db.models.constants import LOOKUP_SEP
 from django.utils.html import strip_tags
+from django.utils.text import smart_split, unescape_string_literal
 
 from . import widgets
 
 ALL_FIELDS = '__all__'
 
+# range of 64 bit integer column, the largest integer supported by SQLite and most backends
+INTEGER_RANGE = (-9223372036854775808, 9223372036854775807)
+
+# TableView subclasses, used by warmup; classes created dynamically are not kept alive
+table_registry = WeakSet()
+
 
 class DeclarativeFieldsMetaclass(type):
     """
@@ -29,6 +39,7 @@ class DeclarativeFieldsMetaclass(type):
             if isinstance(value, widgets.BaseWidget):
                 if not value.refname:
                     value.refname = key
+                value.compile()
                 current_columns.append((key, value))
                 attrs.pop(key)
         current_columns.sort(key=lambda x: x[1].creation_counter)
@@ -41,25 +52,107 @@ class DeclarativeFieldsMetaclass(type):
         attrs['sortable'] = getattr(attr_meta, 'sortable', ())
         attrs['filter_form'] = getattr(attr_meta, 'filter_form', None)
         attrs['search'] = getattr(attr_meta, 'search', None)
+        attrs['search_modes'] = getattr(attr_meta, 'search_modes', {})
+        attrs['search_id_fields'] = getattr(attr_meta, 'search_id_fields', ())
+        attrs['facets'] = getattr(attr_meta, 'facets', ())
         attrs['use_keyboard'] = getattr(attr_meta, 'use_keyboard', False)
         attrs['reload_interval'] = getattr(attr_meta, 'reload_interval', None)
         attrs['global_profile'] = getattr(attr_meta, 'global_profile', False)
         attrs['paginator_class'] = getattr(attr_meta, 'paginator_class', None)
+        attrs['prefetch_pages'] = getattr(attr_meta, 'prefetch_pages', 0)
+        attrs['prefetch_timeout'] = getattr(attr_meta, 'prefetch_timeout', 60)
+        attrs['snapshot_timeout'] = getattr(attr_meta, 'snapshot_timeout', None)
+        attrs['snapshot_max_rows'] = getattr(attr_meta, 'snapshot_max_rows', 10000)
         attrs['template'] = getattr(attr_meta, 'template', 'sdh/table/table_body.html')
         attrs['template_body_content'] = getattr(attr_meta,
                                                  'template_body_content',
                                                  'sdh/table/table_body_content.html')
         attrs['template_paginator'] = getattr(attr_meta, 'template_paginator', 'sdh/table/table_paginator.html')
+        attrs['template_row'] = getattr(attr_meta, 'template_row', 'sdh/table/table_row.html')
+        attrs['template_group_row'] = getattr(attr_meta, 'template_group_row', 'sdh/table/table_group_row.html')
         attrs['template_context'] = getattr(attr_meta, 'template_context', dict())
         attrs['csv_allow'] = getattr(attr_meta, 'csv_allow', False)
         attrs['csv_dialect'] = getattr(attr_meta, 'csv_dialect', csv.excel)
         attrs['title'] = getattr(attr_meta, 'title', None)
+        attrs['data_version'] = getattr(attr_meta, 'data_version', None)
+        attrs['conditional_page'] = getattr(attr_meta, 'conditional_page', False)
+        attrs['version_field'] = getattr(attr_meta, 'version_field', None)
+        attrs['timing'] = getattr(attr_meta, 'timing', None)
+        attrs['query_detector'] = getattr(attr_meta, 'query_detector', None)
+        attrs['json_rows_limit'] = getattr(attr_meta, 'json_rows_limit', 500)
+        attrs['aggregate_cache_timeout'] = getattr(attr_meta, 'aggregate_cache_timeout', None)
+        attrs['read_database'] = getattr(attr_meta, 'read_database', None)
+        attrs['count_timeout'] = getattr(attr_meta, 'count_timeout', None)
+        attrs['concurrent_count'] = getattr(attr_meta, 'concurrent_count', False)
+        attrs['group_by'] = getattr(attr_meta, 'group_by', None)
+        attrs['group_paginate'] = getattr(attr_meta, 'group_paginate', 'rows')
+        attrs['model'] = getattr(attr_meta, 'model', None)
+        attrs['push'] = getattr(attr_meta, 'push', None)
 
         new_class = super_new(cls, name, bases, attrs, **kwargs)
+        if any(isinstance(base, DeclarativeFieldsMetaclass) for base in bases):
+            table_registry.add(new_class)
 
         return new_class
 
 
+class Columns(OrderedDict):
+    """
+    Columns of a table instance.
+
+    Widgets are shared with the table class, so instantiation does not copy them.
+    Column accessed by key, ``get``, ``values`` or ``items`` gets its own copy first,
+    so it can be customized per instance without touching class definition.
+    ``get_shared`` and ``shared_items`` return columns without copying for read-only use.
+    """
+
+    def __init__(self, base_columns=()):
+        self.owned = set()
+        super().__init__(base_columns)
+        self.owned.clear()
+
+    def __getitem__(self, key):
+        column = super().__getitem__(key)
+        if key not in self.owned:
+            column = copy(column)
+            super().__setitem__(key, column)
+            self.owned.add(key)
+        return column
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.owned.add(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[key] for key in list(self)]
+
+    def items(self):
+        return [(key, self[key]) for key in list(self)]
+
+    def get_shared(self, key):
+        return super().__getitem__(key)
+
+    def shared_items(self):
+        return super().items()
+
+    def pop(self, key, *args):
+        if key in self:
+            self[key]
+        self.owned.discard(key)
+        return super().pop(key, *args)
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+
 class TableView(metaclass=DeclarativeFieldsMetaclass):
     lookup_prefixes = {
         '^': 'istartswith',
@@ -69,7 +162,7 @@ class TableView(metaclass=DeclarativeFieldsMetaclass):
     }
 
     def __init__(self, ref_id, **kwargs):
-        self.columns = deepcopy(self.base_columns)
+        self.columns = Columns(self.base_columns)
         self.id = ref_id
         self.kwargs = kwargs
 
@@ -109,9 +202,62 @@ class TableView(metaclass=DeclarativeFieldsMetaclass):
         if lookup:
             field_name = field_name[1:]
         else:
-            lookup = 'icontains'
+            lookup = self.search_modes.get(field_name, 'icontains')
         return LOOKUP_SEP.join([field_name, lookup])
 
+    def get_search_terms(self, search_value):
+        """
+        Split search value into terms, quoted phrases are kept as one term.
+        """
+        terms = []
+        for bit in smart_split(search_value):
+            if bit[0] in ('"', "'") and bit[0] == bit[-1] and len(bit) > 1:
+                bit = unescape_string_literal(bit)
+            if bit:
+                terms.append(bit)
+        return terms
+
+    def construct_search_term(self, term, orm_lookups, queryset=None):
+        """
+        Return condition matching term by any of search fields. Numeric terms also
+        match ``Meta.search_id_fields`` exactly, when they fit into the field range.
+        """
+        queries = [models.Q(**{orm_lookup: term}) for orm_lookup in orm_lookups]
+        if term.isdecimal():
+            value = int(term)
+            for field_name in self.search_id_fields:
+                min_value, max_value = self.get_id_field_range(queryset, field_name)
+                if (min_value is None or min_value <= value) and (max_value is None or value <= max_value):
+                    queries.append(models.Q(**{field_name: value}))
+        if not queries:
+            return models.Q(pk__in=[])
+        return reduce(operator.or_, queries)
+
+    def get_id_field_range(self, queryset, field_name):
+        """
+        Return (min, max) value of search id field, bounds are None for not integer field.
+        Range of unknown field or unlimited integer column is 64 bit integer.
+        """
+        if queryset is None:
+            return INTEGER_RANGE
+        opts = queryset.model._meta
+        field = None
+        for part in field_name.split(LOOKUP_SEP):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                return INTEGER_RANGE
+            if field.is_relation and field.related_model is not None:
+                opts = field.related_model._meta
+        if field.is_relation and field.related_model is not None:
+            field = field.target_field
+        if not isinstance(field, models.IntegerField):
+            # value is compared as text
+            return None, None
+        min_value, max_value = connections[queryset.db].ops.integer_field_range(field.get_internal_type())
+        return (INTEGER_RANGE[0] if min_value is None else min_value,
+                INTEGER_RANGE[1] if max_value is None else max_value)
+
     def must_call_distinct(self, queryset):
         """
         Return True if 'distinct()' should be used to query the given lookups.
@@ -135,10 +281,13 @@ class TableView(metaclass=DeclarativeFieldsMetaclass):
     def apply_search(self, search_value, source):
         if not search_value:
             return
-        orm_lookups = [self.construct_search(str(search_field)) for search_field in self.search]
+        orm_lookups = [self.construct_search(str(search_field)) for search_field in self.search or ()]
+        terms = self.get_search_terms(search_value)
+        if not terms:
+            return
         base = source.qs
-        queries = [models.Q(**{orm_lookup: search_value}) for orm_lookup in orm_lookups]
-        source.filter(reduce(operator.or_, queries))
+        queries = [self.construct_search_term(term, orm_lookups, base) for term in terms]
+        source.filter(reduce(operator.and_, queries))
         if self.must_call_distinct(source.qs):
             # Filtering against a many-to-many field requires us to
             # call queryset.distinct() in order to avoid duplicate items
@@ -178,6 +327,44 @@ class CellTitle:
         return self.key in self.controller.visible_columns
 
 
+class CellFooter:
+    def __init__(self, controller, key, column, aggregates):
+        self.controller = controller
+        self.key = key
+        self.column = column
+        self.aggregates = aggregates
+
+    def items(self):
+        """
+        Return list of (aggregate name, value) formatted by column widget when it supports batch formatting.
+        """
+        names = list(self.aggregates)
+        values = [self.aggregates[name] for name in names]
+        if getattr(self.column, 'batch_format', False):
+            values = [value if name == 'count' else text
+                      for name, value, text in zip(names, values, self.column.format_values(values))]
+        return list(zip(names, values))
+
+    def html_cell_attr(self):
+        return self.column.html_cell_attr()
+
+
+_accepts_cell_value = {}
+
+
+def accepts_cell_value(column):
+    """
+    True when ``html_cell`` of the widget accepts already resolved ``value`` keyword,
+    widgets declared with ``html_cell(self, row_index, row, request=None)`` do not.
+    """
+    column_class = type(column)
+    if column_class not in _accepts_cell_value:
+        parameters = inspect.signature(column.html_cell).parameters.values()
+        _accepts_cell_value[column_class] = any(parameter.name == 'value' or parameter.kind == parameter.VAR_KEYWORD
+                                                for parameter in parameters)
+    return _accepts_cell_value[column_class]
+
+
 class BoundCell:
     def __init__(self, row_index, key, bound_row, column):
         self.row_index = row_index
@@ -186,27 +373,53 @@ class BoundCell:
         self.column = column
         self.row_index = row_index
 
+    @property
+    def value(self):
+        """
+        Column value of the row, resolved once and shared by class, style, html and export callbacks.
+        """
+        return self.bound_row.get_value(self.key, self.column)
+
     def get_cell_class(self):
+        with self.bound_row.controller.query_detector.column(self.key):
+            return self._get_cell_class()
+
+    def _get_cell_class(self):
         if hasattr(self.bound_row.controller.table, 'cell_class_%s' % self.key):
             cb = getattr(self.bound_row.controller.table, 'cell_class_%s' % self.key)
             return cb(self.bound_row.controller.table, self.row_index, self.bound_row.row,
-                      self.column.get_value(self.bound_row.row))
+                      self.value)
         return ''
 
     def get_cell_style(self):
+        with self.bound_row.controller.query_detector.column(self.key):
+            return self._get_cell_style()
+
+    def _get_cell_style(self):
         if hasattr(self.bound_row.controller.table, 'cell_style_%s' % self.key):
             cb = getattr(self.bound_row.controller.table, 'cell_style_%s' % self.key)
             return cb(self.bound_row.controller.table, self.row_index, self.bound_row.row,
-                      self.column.get_value(self.bound_row.row))
+                      self.value)
         return ''
 
     def as_html(self):
+        controller = self.bound_row.controller
+        with controller.timer.column(self.key), controller.query_detector.column(self.key):
+            return self._as_html()
+
+    def _as_html(self):
         if hasattr(self.bound_row.controller.table, 'render_%s' % self.key):
             cb = getattr(self.bound_row.controller.table, 'render_%s' % self.key)
             return cb(self.bound_row.controller.table, self.row_index, self.bound_row.row,
-                      self.column.get_value(self.bound_row.row))
+                      self.value)
+
+        if self.key in self.bound_row.formatted:
+            return self.bound_row.formatted[self.key]
 
-        return self.column.html_cell(self.row_index, self.bound_row.row, request=self.bound_row.controller.request)
+        kwargs = {'request': self.bound_row.controller.request}
+        if accepts_cell_value(self.column):
+            kwargs['value'] = self.value
+        return self.column.html_cell(self.row_index, self.bound_row.row, **kwargs)
 
     def as_csv(self):
         cb = getattr(self.bound_row.controller.table, 'render_csv_%s' % self.key, None)
@@ -214,7 +427,7 @@ class BoundCell:
             return cb(self.bound_row.controller.table,
                       self.row_index,
                       self.bound_row.row,
-                      self.column.get_value(self.bound_row.row))
+                      self.value)
 
         default_value = re.sub(r'\n\r|\r\n|\r|\n',
                                ' ',
@@ -222,11 +435,15 @@ class BoundCell:
         return default_value
 
     def to_python(self):
+        with self.bound_row.controller.query_detector.column(self.key):
+            return self._to_python()
+
+    def _to_python(self):
         if hasattr(self.bound_row.controller.table, 'to_python_%s' % self.key):
             cb = getattr(self.bound_row.controller.table, 'to_python_%s' % self.key)
             return cb(self.bound_row.controller.table, self.row_index, self.bound_row.row,
-                      self.column.get_value(self.bound_row.row))
-        return self.column.get_value(self.bound_row.row)
+                      self.value)
+        return self.value
 
     def html_cell_attr(self):
         return self.column.html_cell_attr()
@@ -235,19 +452,61 @@ class BoundCell:
         return self.key
 
 
+class GroupRow:
+    """
+    Header or subtotal row of a group, emitted by the controller between data rows.
+    """
+    is_group = True
+
+    def __init__(self, controller, key, bound_row, aggregates, count, is_header):
+        self.controller = controller
+        self.key = key
+        self.bound_row = bound_row
+        self.row_index = bound_row.row_index
+        self.aggregates = aggregates
+        self.count = count
+        self.is_header = is_header
+
+    def __iter__(self):
+        for key, column in self.controller.iter_columns():
+            yield CellFooter(self.controller, key, column, self.aggregates.get(key, {}))
+
+    def get_label(self):
+        """
+        Group column value of the first group row rendered by its widget.
+        """
+        key = self.controller.table.group_by
+        return BoundCell(self.row_index, key, self.bound_row, self.controller.table.columns.get_shared(key)).as_html()
+
+    def get_colspan(self):
+        return len(list(self.controller.iter_columns()))
+
+
 class BoundRow:
+    is_group = False
+
     def __init__(self, controller, row_index, row):
         self.controller = controller
         self.row = row
         self.row_index = row_index
+        self.values = {}
+        self.formatted = {}
 
     def __iter__(self):
         for key, column in self.controller.iter_columns():
             yield BoundCell(self.row_index, key, self, column)
 
+    def get_value(self, key, column):
+        if key not in self.values:
+            self.values[key] = column.get_value(self.row)
+        return self.values[key]
+
     def get_id(self):
         table_id = self.controller.table.get_id() or 'table'
         return "%s_row_%d" % (table_id, self.row_index)
 
+    def get_pk(self):
+        return getattr(self.row, 'pk', None)
+
     def get_row_class(self):
         return self.controller.table.get_row_class(self.controller, self.row)
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from sdh.table import QSDataSource, TableController, TableView, widgets
+from sdh.table.models import TableViewProfile
+
+
+class ProfileTable(TableView):
+    label = widgets.LabelWidget('Label', cell_attr={'class': 'label'})
+    user = widgets.LabelWidget('User', refname='user__username')
+    tableview_name = widgets.LabelWidget('Name')
+
+    class Meta:
+        permanent = ('label', )
+        sortable = ('label', )
+
+
+def get_table(table_class=ProfileTable, name='profiles', **options):
+    """
+    Return table instance, ``options`` override its ``Meta`` options.
+    """
+    table = table_class(name)
+    for option, value in options.items():
+        setattr(table, option, value)
+    return table
+
+
+def get_request(params=None, session=None, user=None, request_factory=RequestFactory, **headers):
+    """
+    Return GET request with session and user set as by middlewares.
+    """
+    request = request_factory().get('/', params or {}, **headers)
+    request.session = {} if session is None else session
+    request.user = AnonymousUser() if user is None else user
+    return request
+
+
+def get_controller(table=None, request=None, queryset=None, source=None, controller_class=TableController,
+                   **kwargs):
+    """
+    Return controller of ``table`` (``ProfileTable`` by default) over ``source``,
+    which is ``queryset`` of ``TableViewProfile`` by default.
+    """
+    if table is None:
+        table = get_table()
+    if request is None:
+        request = get_request()
+    if source is None:
+        source = QSDataSource(TableViewProfile.objects.all() if queryset is None else queryset)
+    return controller_class(table, source, request, **kwargs)
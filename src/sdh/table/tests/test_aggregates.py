@@ -0,0 +1,153 @@
+from django import forms
+from django.test import TestCase
+
+from sdh.table import TableView, widgets
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_request, get_table
+
+
+class AggregateTable(TableView):
+    label = widgets.LabelWidget('Label', aggregate='count')
+    id = widgets.NumberWidget('Id', aggregate=('sum', 'max'))
+
+    class Meta:
+        permanent = ('label', 'id')
+
+
+class AggregateTest(TestCase):
+
+    def setUp(self):
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+                         for i in range(3)]
+
+    def test_single_query(self):
+        controller = get_controller(AggregateTable('aggregates'), row_per_page=2)
+
+        with self.assertNumQueries(1):
+            aggregates = controller.get_aggregates()
+            controller.calc_paginator()
+
+        ids = [profile.id for profile in self.profiles]
+        self.assertEqual(aggregates, {'label': {'count': 3}, 'id': {'sum': sum(ids), 'max': max(ids)}})
+        self.assertEqual(controller.paginator.get_rows_count(), 3)
+        footer = dict(controller.iter_footer())
+        self.assertEqual(footer['id'].items(), [('sum', str(sum(ids))), ('max', str(max(ids)))])
+
+
+class FacetFilterForm(forms.Form):
+    has_facets = True
+
+    label = forms.ChoiceField(required=False)
+
+    def __init__(self, *args, request=None, facet_counts=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['label'].choices = [(value, '%s (%d)' % (value, count))
+                                        for value, count in sorted(facet_counts['label'].items())]
+
+
+class FacetTable(TableView):
+    label = widgets.LabelWidget('Label')
+
+    class Meta:
+        permanent = ('label', )
+        filter_form = FacetFilterForm
+        facets = ('label', 'is_default')
+
+    def apply_filter(self, cleaned_data, source):
+        if cleaned_data.get('label'):
+            source.filter(label=cleaned_data['label'])
+
+
+class FacetTest(TestCase):
+
+    def setUp(self):
+        for label in ('a', 'a', 'b'):
+            TableViewProfile.objects.create(tableview_name='test', label=label)
+
+    def get_controller(self, state=None):
+        return get_controller(FacetTable('facets'), get_request(session={'tableview_facets': state or {}}))
+
+    def test_facet_counts(self):
+        controller = self.get_controller()
+        controller.restore()
+        with self.assertNumQueries(2):
+            controller.process_form_filter()
+        self.assertEqual(controller.form_filter_instance.fields['label'].choices,
+                         [('a', 'a (2)'), ('b', 'b (1)')])
+        self.assertEqual(controller.get_facet_counts()['is_default'], {False: 3})
+
+    def test_filtered_facet_counts(self):
+        controller = self.get_controller({'f': {'label': 'b'}})
+        controller.restore()
+        self.assertEqual(controller.get_facet_counts()['label'], {'b': 1})
+        self.assertEqual(controller.source.count(), 3)
+
+
+class GroupTable(TableView):
+    tableview_name = widgets.LabelWidget('Table')
+    id = widgets.NumberWidget('Id', aggregate='sum')
+
+    class Meta:
+        permanent = ('tableview_name', 'id')
+        group_by = 'tableview_name'
+
+
+class GroupTest(TestCase):
+
+    def setUp(self):
+        self.profiles = [TableViewProfile.objects.create(tableview_name=name, label='profile %d' % i)
+                         for i, name in enumerate(('b', 'a', 'b', 'a', 'b'))]
+
+    def get_controller(self, group_paginate='rows', **params):
+        table = get_table(GroupTable, 'groups', group_paginate=group_paginate, csv_allow=True)
+        return get_controller(table, get_request(params), TableViewProfile.objects.order_by('id'), row_per_page=3)
+
+    def get_paginated_controller(self, group_paginate='rows', aggregates=False):
+        controller = self.get_controller(group_paginate)
+        controller.prepare_source()
+        if aggregates:
+            controller.get_aggregates()
+        controller.calc_paginator()
+        return controller
+
+    def get_layout(self, rows):
+        layout = []
+        for row in rows:
+            if not row.is_group:
+                layout.append(row.get_pk())
+            elif row.is_header:
+                layout.append(('header', row.key, row.count))
+            else:
+                layout.append(('subtotal', row.key, row.aggregates))
+        return layout
+
+    def test_rows_pagination(self):
+        controller = self.get_paginated_controller()
+        with self.assertNumQueries(2):
+            rows = list(controller.get_paginated_rows())
+        a1, a2, b1, b2, b3 = sorted(self.profiles, key=lambda p: (p.tableview_name, p.id))
+        self.assertEqual(self.get_layout(rows), [
+            ('header', 'a', 2), a1.pk, a2.pk, ('subtotal', 'a', {'id': {'sum': a1.pk + a2.pk}}),
+            ('header', 'b', 3), b1.pk, ('subtotal', 'b', {'id': {'sum': b1.pk + b2.pk + b3.pk}}),
+        ])
+
+    def test_groups_pagination(self):
+        controller = self.get_paginated_controller('groups')
+        self.assertEqual(controller.paginator.get_rows_count(), 2)
+        with self.assertNumQueries(3):
+            rows = list(controller.get_paginated_rows())
+        self.assertEqual([row.key for row in rows if row.is_group], ['a', 'a', 'b', 'b'])
+        self.assertEqual(len([row for row in rows if not row.is_group]), 5)
+
+    def test_groups_pagination_with_aggregates(self):
+        controller = self.get_paginated_controller('groups', aggregates=True)
+        self.assertEqual(controller.get_aggregates()['id']['sum'], sum(profile.pk for profile in self.profiles))
+        self.assertEqual(controller.paginator.get_rows_count(), 2)
+        self.assertEqual(controller.paginator.get_page_count(), 1)
+
+    def test_csv(self):
+        response = self.get_controller(csv='1').process_request()
+        lines = response.content.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Table,Id')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['a', 'a', 'b', 'b', 'b'])
@@ -0,0 +1,125 @@
+import json
+
+from django.contrib.auth.models import User
+from django.db.models import Max
+from django.test import TestCase
+
+from sdh.table import QSDataSource, TableView, widgets
+from sdh.table.datasource import SqlDataSource
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_request, get_table
+
+
+class ConditionalResponseTest(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+
+    def get_controller(self, **headers):
+        request = get_request({'action': 'load_page'}, HTTP_X_REQUESTED_WITH='XMLHttpRequest', **headers)
+        return get_controller(get_table(data_version=Max('id')), request, row_per_page=2)
+
+    def test_etag_not_modified(self):
+        etag = self.get_controller().get_etag()
+        self.assertTrue(etag)
+
+        response = self.get_controller(HTTP_IF_NONE_MATCH=etag).process_request()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changed(self):
+        etag = self.get_controller().get_etag()
+        TableViewProfile.objects.create(tableview_name='test', label='new')
+        self.assertNotEqual(self.get_controller().get_etag(), etag)
+
+
+class DeltaRefreshTest(TestCase):
+
+    def setUp(self):
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+                         for i in range(3)]
+
+    def get_response(self, source=None, **params):
+        params['action'] = 'load_delta'
+        request = get_request(params, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        controller = get_controller(get_table(version_field='id'), request, TableViewProfile.objects.order_by('id'),
+                                    source, row_per_page=10)
+        return controller.process_request()
+
+    def load_delta(self, source=None, **params):
+        return json.loads(self.get_response(source, **params).content)
+
+    def test_full_delta(self):
+        data = self.load_delta()
+        self.assertEqual(data['version'], self.profiles[-1].id)
+        self.assertEqual(data['order'], [item.id for item in self.profiles])
+        self.assertEqual(len(data['rows']), 3)
+        self.assertIn('profile 0', data['rows'][0]['html'])
+
+    def test_partial_delta(self):
+        removed = self.profiles[0]
+        data = self.load_delta(version=self.profiles[-1].id,
+                               rows=','.join(str(item.id) for item in self.profiles))
+        self.assertEqual(data['rows'], [])
+
+        removed.delete()
+        new = TableViewProfile.objects.create(tableview_name='test', label='new')
+        data = self.load_delta(version=self.profiles[-1].id,
+                               rows=','.join(str(item.id) for item in self.profiles))
+        self.assertEqual([row['id'] for row in data['rows']], [new.id])
+        self.assertEqual(data['removed'], [str(removed.id)])
+        self.assertEqual(data['version'], new.id)
+
+    def test_primary_key(self):
+        source = QSDataSource(TableViewProfile.objects.order_by('id'), primary_key='label')
+        data = self.load_delta(source)
+        self.assertEqual(data['order'], [item.label for item in self.profiles])
+        self.assertEqual([row['id'] for row in data['rows']], data['order'])
+
+    def test_unsupported_source(self):
+        response = self.get_response(SqlDataSource('SELECT 1'))
+        self.assertEqual(response.status_code, 400)
+
+
+class JsonRowsTable(TableView):
+    label = widgets.LabelWidget('Label')
+    user = widgets.LabelWidget('User')
+    is_default = widgets.LabelWidget('Default')
+
+    class Meta:
+        permanent = ('label', 'user')
+        sortable = ('label', )
+        search = ('label', )
+        json_rows_limit = 2
+
+
+class JsonRowsTest(TestCase):
+
+    def setUp(self):
+        user = User.objects.create(username='john')
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i, user=user)
+                         for i in range(3)]
+
+    def load_rows(self, **params):
+        params['action'] = 'load_rows'
+        request = get_request(params, {'tableview_rows': {'s': '-label'}}, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        response = get_controller(JsonRowsTable('rows'), request).process_request()
+        return json.loads(response.content)
+
+    def test_window(self):
+        data = self.load_rows(limit=10, total=1)
+        self.assertEqual(data['columns'], ['label', 'user'])
+        self.assertEqual(data['rows'], [['profile 2', 'john'], ['profile 1', 'john']])
+        self.assertEqual(data['ids'], [self.profiles[2].pk, self.profiles[1].pk])
+        self.assertEqual(data['next'], 2)
+        self.assertEqual(data['total'], 3)
+
+        data = self.load_rows(offset=2)
+        self.assertEqual(data['rows'], [['profile 0', 'john']])
+        self.assertIsNone(data['next'])
+
+    def test_search(self):
+        data = self.load_rows(search='profile 1')
+        self.assertEqual(data['rows'], [['profile 1', 'john']])
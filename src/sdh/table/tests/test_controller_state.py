@@ -0,0 +1,128 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.test import TestCase, override_settings
+
+from sdh.table.controller import restore_controllers
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_request, get_table
+
+
+class SessionStateTest(TestCase):
+
+    def setUp(self):
+        self.session = SessionStore()
+
+    def process(self, **params):
+        controller = get_controller(request=get_request(params, self.session))
+        controller.process_request()
+        return controller
+
+    def test_write_only_on_change(self):
+        self.process()
+        self.assertTrue(self.session.modified)
+        self.assertEqual(self.session['tableview_profiles'], {})
+
+        self.session.modified = False
+        self.process(page=2)
+        self.assertFalse(self.session.modified)
+
+        self.process(sort_by='-label')
+        self.assertTrue(self.session.modified)
+        self.assertEqual(self.session['tableview_profiles'], {'s': '-label'})
+
+        self.session.modified = False
+        controller = self.process(page=3)
+        self.assertFalse(self.session.modified)
+        self.assertEqual(controller.get_sort(), '-label')
+
+    def test_legacy_state(self):
+        self.session['tableview_profiles'] = {'visible': ['tableview_name'], 'sort_by': 'label', 'filter': {}}
+        controller = self.process()
+        self.assertEqual(controller.visible_columns, ['tableview_name'])
+        self.assertEqual(self.session['tableview_profiles'], {'v': ['tableview_name'], 's': 'label'})
+
+    def test_empty_filter_values_kept(self):
+        self.session['tableview_profiles'] = {'f': {'label': None, 'user': ''}}
+        controller = self.process()
+        self.assertEqual(controller.filter, {'label': None, 'user': ''})
+        self.assertEqual(self.session['tableview_profiles'], {'f': {'label': None, 'user': ''}})
+
+    def test_in_place_change_saved(self):
+        self.session['tableview_profiles'] = {'v': ['label']}
+        controller = get_controller(request=get_request(session=self.session))
+        controller.restore()
+        self.session.modified = False
+        controller.show_column('tableview_name')
+        controller.save()
+        self.assertTrue(self.session.modified)
+        self.assertEqual(self.session['tableview_profiles'], {'v': ['label', 'tableview_name']})
+
+
+class RestoreControllersTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='john')
+        for name in ('first', 'second', 'third'):
+            TableViewProfile.objects.create(user=self.user, tableview_name=name, is_default=True,
+                                            dump=TableViewProfile.dump_state({'sort_by': '-label'}))
+        self.saved = TableViewProfile.objects.create(user=self.user, tableview_name='second', label='saved',
+                                                     dump=TableViewProfile.dump_state({'sort_by': 'label'}))
+
+    def get_controller(self, name, **params):
+        return get_controller(get_table(name=name), get_request(params, SessionStore(), self.user))
+
+    def test_single_query(self):
+        controllers = [self.get_controller(name) for name in ('first', 'second', 'third', 'missing')]
+        with self.assertNumQueries(1):
+            restore_controllers(controllers)
+        self.assertEqual([controller.get_sort() for controller in controllers], ['-label', '-label', '-label', ''])
+
+        with self.assertNumQueries(0):
+            controllers[0].process_request()
+
+    def test_selected_profile(self):
+        controllers = [self.get_controller(name, profile=str(self.saved.pk)) for name in ('first', 'second')]
+        restore_controllers(controllers)
+        self.assertIsNone(controllers[0].profile)
+        self.assertEqual(controllers[1].profile, self.saved)
+        self.assertEqual(controllers[1].get_sort(), 'label')
+
+    def test_saved_state_without_dump(self):
+        profiles = list(self.get_controller('second').get_saved_state())
+        self.assertEqual(profiles, [self.saved])
+        self.assertEqual(profiles[0].get_deferred_fields(), {'dump'})
+
+
+@skipUnless('replica' in settings.DATABASES, "requires 'replica' database alias")
+@override_settings(SDH_TABLE_READ_DATABASE='replica')
+class ReadDatabaseTest(TestCase):
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        self.user = User.objects.create(username='john')
+        TableViewProfile.objects.create(tableview_name='other', label='primary')
+        TableViewProfile.objects.using('replica').create(tableview_name='other', label='replica')
+
+    def get_controller(self):
+        return get_controller(get_table(name='replica_test'), get_request(user=self.user),
+                              TableViewProfile.objects.filter(tableview_name='other'), row_per_page=10)
+
+    def test_reads_from_replica(self):
+        controller = self.get_controller()
+        controller.calc_paginator()
+        self.assertEqual([row.row.label for row in controller.get_paginated_rows()], ['replica'])
+
+    def test_profiles_on_primary(self):
+        controller = self.get_controller()
+        controller.visible_columns = ['label', 'tableview_name']
+        result = controller.save_state()
+        self.assertTrue(TableViewProfile.objects.using('default').filter(id=result['id']).exists())
+
+        controller = self.get_controller()
+        controller.restore()
+        self.assertEqual(controller.profile.id, result['id'])
+        self.assertEqual(list(controller.visible_columns), ['label', 'tableview_name'])
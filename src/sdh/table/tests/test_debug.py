@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from sdh.table.debug import assert_no_n_plus_one
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_table
+
+
+class QueryDetectorTest(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            user = User.objects.create(username='user%d' % i)
+            TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i, user=user)
+
+    def get_controller(self, qs):
+        return get_controller(get_table(permanent=('label', 'user')), queryset=qs)
+
+    def test_relation_per_row(self):
+        controller = self.get_controller(TableViewProfile.objects.all())
+        with self.assertRaisesRegex(AssertionError, 'column "user" \\(refname "user__username"\\)'):
+            assert_no_n_plus_one(controller)
+
+    def test_select_related(self):
+        controller = self.get_controller(TableViewProfile.objects.select_related('user'))
+        assert_no_n_plus_one(controller)
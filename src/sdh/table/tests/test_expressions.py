@@ -0,0 +1,33 @@
+from django.db.models import Value
+from django.db.models.functions import Concat, Upper
+from django.test import TestCase
+
+from sdh.table import TableView, widgets
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_request
+
+
+class ExpressionTable(TableView):
+    label = widgets.LabelWidget('Label')
+    title = widgets.LabelWidget('Title', expression=Concat(Upper('tableview_name'), Value(': '), 'label'))
+
+    class Meta:
+        permanent = ('label', 'title')
+        sortable = ('title', )
+
+
+class ExpressionColumnTest(TestCase):
+
+    def setUp(self):
+        TableViewProfile.objects.create(tableview_name='b', label='one')
+        TableViewProfile.objects.create(tableview_name='a', label='two')
+
+    def test_sort_and_render(self):
+        controller = get_controller(ExpressionTable('expressions'), get_request({'sort_by': '-title'}))
+        controller.process_request()
+        controller.prepare_source()
+
+        with self.assertNumQueries(1):
+            rows = [[cell.as_html() for cell in row] for row in controller.get_paginated_rows()]
+        self.assertEqual(rows, [['one', 'B: one'], ['two', 'A: two']])
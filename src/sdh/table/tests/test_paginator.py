@@ -0,0 +1,163 @@
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max
+from django.http import Http404
+from django.test import TestCase, TransactionTestCase
+
+from sdh.table import LazyPaginator, Paginator, QSDataSource, TableView, widgets
+from sdh.table.dbutils import QueryTimeout, time_limit
+from sdh.table.models import TableViewProfile
+
+from . import get_controller, get_request, get_table
+
+
+class PrefetchPaginatorTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+                         for i in range(7)]
+
+    def get_paginator(self, paginator_class, page):
+        source = QSDataSource(TableViewProfile.objects.order_by('id'))
+        paginator = paginator_class(source, row_per_page=3, skip_startup_recalc=True)
+        paginator.enable_prefetch('profiles', pages=2)
+        paginator.calc(page)
+        return paginator
+
+    def test_next_page_from_cache(self):
+        with self.assertNumQueries(3):
+            rows = list(self.get_paginator(Paginator, 1).get_items())
+        self.assertEqual(rows, self.profiles[0:3])
+
+        with self.assertNumQueries(1):
+            rows = list(self.get_paginator(Paginator, 2).get_items())
+        self.assertEqual(rows, self.profiles[3:6])
+
+        with self.assertNumQueries(1):
+            paginator = self.get_paginator(Paginator, 3)
+            rows = list(paginator.get_items())
+        self.assertEqual(rows, self.profiles[6:])
+        self.assertEqual(paginator.get_page_count(), 3)
+
+    def test_lazy_next_page_from_cache(self):
+        with self.assertNumQueries(2):
+            paginator = self.get_paginator(LazyPaginator, 1)
+        self.assertEqual(list(paginator.get_items()), self.profiles[0:3])
+        self.assertEqual(paginator.get_page_count(), 2)
+
+        with self.assertNumQueries(1):
+            paginator = self.get_paginator(LazyPaginator, 2)
+        self.assertEqual(list(paginator.get_items()), self.profiles[3:6])
+        self.assertEqual(paginator.get_page_count(), 3)
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+                         for i in range(5)]
+
+    def get_rows(self, **params):
+        controller = get_controller(get_table(name='snapshot', snapshot_timeout=60), get_request(params),
+                                    TableViewProfile.objects.order_by('id'), row_per_page=2)
+        controller.calc_paginator()
+        return [bound_row.row for bound_row in controller.get_paginated_rows()]
+
+    def test_snapshot_paging(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_rows(), self.profiles[0:2])
+
+        self.profiles[2].delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_rows(page=2), self.profiles[3:4])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_rows(page=3), self.profiles[4:5])
+
+
+class AggregateTimeoutTable(TableView):
+    label = widgets.LabelWidget('Label')
+    id = widgets.NumberWidget('Id', aggregate='sum')
+
+    class Meta:
+        permanent = ('label', 'id')
+        count_timeout = 0.000001
+        data_version = Max('id')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'uses SQLite progress handler')
+class CountTimeoutTest(TestCase):
+
+    def setUp(self):
+        TableViewProfile.objects.bulk_create([TableViewProfile(tableview_name='test', label='profile %d' % i)
+                                              for i in range(500)])
+
+    def test_time_limit(self):
+        with self.assertRaises(QueryTimeout):
+            with time_limit(0.000001):
+                TableViewProfile.objects.filter(label__contains='9').count()
+        self.assertEqual(TableViewProfile.objects.count(), 500)
+
+    def get_controller(self, table):
+        return get_controller(table, get_request({'page': '2'}),
+                              TableViewProfile.objects.filter(label__contains='9').order_by('id'), row_per_page=10)
+
+    def test_fallback_to_lazy_paginator(self):
+        controller = self.get_controller(get_table(name='timeout', count_timeout=0.000001))
+        controller.calc_paginator()
+
+        self.assertTrue(controller.count_unknown)
+        self.assertIsInstance(controller.paginator, LazyPaginator)
+        self.assertEqual(controller.paginator.page, 2)
+        self.assertEqual(controller.paginator.get_next_page(), 3)
+        self.assertEqual(len(list(controller.get_paginated_rows())), 10)
+
+    def test_aggregate_timeout(self):
+        controller = self.get_controller(AggregateTimeoutTable('aggregate_timeout'))
+        self.assertIsNone(controller.get_etag())
+        self.assertEqual(controller.get_aggregates(), {})
+        with self.assertNumQueries(1):
+            controller.calc_paginator()
+
+        self.assertTrue(controller.count_unknown)
+        self.assertIsInstance(controller.paginator, LazyPaginator)
+        self.assertEqual(len(list(controller.get_paginated_rows())), 10)
+
+
+class ConcurrentPaginatorTest(TransactionTestCase):
+
+    def setUp(self):
+        self.profiles = [TableViewProfile.objects.create(tableview_name='test', label='profile %d' % i)
+                         for i in range(7)]
+        self.conn_max_age = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = 60
+
+    def tearDown(self):
+        connection.settings_dict['CONN_MAX_AGE'] = self.conn_max_age
+
+    def get_paginator(self, page):
+        source = QSDataSource(TableViewProfile.objects.order_by('id'))
+        paginator = Paginator(source, row_per_page=3, skip_startup_recalc=True)
+        paginator.concurrent = True
+        paginator.calc(page)
+        return paginator
+
+    def test_page_fetched_with_count(self):
+        paginator = self.get_paginator(2)
+        self.assertEqual(paginator.get_rows_count(), 7)
+        with self.assertNumQueries(0):
+            self.assertEqual(paginator.get_items(), self.profiles[3:6])
+
+    def test_out_of_range(self):
+        with self.assertRaises(Http404):
+            self.get_paginator(4)
+
+    def test_not_persistent_connections(self):
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        paginator = self.get_paginator(2)
+        self.assertIsNone(paginator._items)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(paginator.get_items()), self.profiles[3:6])
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+
+from sdh.table import LazyPaginator, Paginator, TableController, TableView, widgets
+from sdh.table.models import TableViewProfile
+from sdh.table.push import LocalBroker, get_broker, get_channel, watch_tables
+
+from . import get_controller, get_request, get_table
+
+
+class LocalBrokerTest(SimpleTestCase):
+
+    async def test_publish(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe('profiles')
+        thread = threading.Thread(target=lambda: [broker.publish('profiles', {'pk': pk}) for pk in (1, 2)])
+        thread.start()
+        thread.join()
+        broker.publish('other', {'pk': 3})
+
+        self.assertEqual(await subscription.get(1), {'pk': 2})
+        with self.assertRaises(asyncio.TimeoutError):
+            await subscription.get(0.01)
+
+        subscription.close()
+        self.assertEqual(broker.subscriptions['profiles'], set())
+
+
+class GroupPushTable(TableView):
+    name = widgets.LabelWidget('Name')
+
+    class Meta:
+        model = Group
+
+
+class WatchTablesTest(SimpleTestCase):
+
+    def tearDown(self):
+        post_save.disconnect(sender=Group, dispatch_uid='sdh_table_push:auth.group')
+        post_delete.disconnect(sender=Group, dispatch_uid='sdh_table_push:auth.group')
+
+    def test_watch_tables(self):
+        watch_tables()
+        self.assertTrue(post_save.has_listeners(Group))
+        self.assertTrue(post_delete.has_listeners(Group))
+
+
+class PushController(TableController):
+    updated = None
+
+    def get_page_data(self):
+        self.calc_paginator()
+        return {'labels': [row.row.label for row in self.get_paginated_rows()]}
+
+    def get_update(self, version=None):
+        result = super().get_update(version)
+        self.updated.set()
+        return result
+
+
+class UpdateTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        TableViewProfile.objects.create(tableview_name='push', label='a')
+
+    def get_controller(self):
+        return get_controller(get_table(name='push_update', snapshot_timeout=60, push=True),
+                              get_request({'page': '1'}),
+                              TableViewProfile.objects.filter(tableview_name='push').order_by('label'),
+                              controller_class=PushController, row_per_page=10)
+
+    def test_snapshot_refreshed(self):
+        # snapshot of the page is cached by previous request
+        self.get_controller().get_page_data()
+        TableViewProfile.objects.create(tableview_name='push', label='b')
+
+        controller = self.get_controller()
+        controller.updated = threading.Event()
+        version, data = controller.get_update()
+        self.assertEqual(data, {'labels': ['a', 'b']})
+
+    def test_lazy_paginator_replaced(self):
+        controller = self.get_controller()
+        controller.updated = threading.Event()
+        controller.use_lazy_paginator()
+        self.assertIsInstance(controller.paginator, LazyPaginator)
+
+        controller.get_update()
+        self.assertFalse(controller.count_unknown)
+        self.assertIs(type(controller.paginator), Paginator)
+
+
+class StreamTest(TransactionTestCase):
+
+    def get_controller(self, request_factory=AsyncRequestFactory, push=True):
+        controller = get_controller(get_table(name='push', snapshot_timeout=60, push=push),
+                                    get_request({'action': 'stream'}, request_factory=request_factory),
+                                    TableViewProfile.objects.filter(tableview_name='push').order_by('label'),
+                                    controller_class=PushController, row_per_page=10)
+        controller.updated = threading.Event()
+        return controller
+
+    def test_wsgi_request(self):
+        response = self.get_controller(RequestFactory).process_request()
+        self.assertEqual(response.status_code, 400)
+
+    def test_push_disabled(self):
+        controller = self.get_controller(push=None)
+        with mock.patch.object(controller, 'stream') as stream:
+            controller.process_request()
+        stream.assert_not_called()
+
+    async def test_stream(self):
+        await TableViewProfile.objects.acreate(tableview_name='push', label='a')
+        controller = await sync_to_async(self.get_controller)()
+        response = await sync_to_async(controller.process_request)()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        events = controller.iter_events(get_channel(TableViewProfile))
+        event = asyncio.ensure_future(events.__anext__())
+        await sync_to_async(controller.updated.wait, thread_sensitive=False)(5)
+        self.assertEqual(len(get_broker().subscriptions[get_channel(TableViewProfile)]), 1)
+
+        # change outside of the table does not produce event
+        controller.updated.clear()
+        await TableViewProfile.objects.acreate(tableview_name='other', label='c')
+        await sync_to_async(controller.updated.wait, thread_sensitive=False)(5)
+        self.assertFalse(event.done())
+
+        await TableViewProfile.objects.acreate(tableview_name='push', label='b')
+        data = await asyncio.wait_for(event, 5)
+        self.assertEqual(data, 'event: update\ndata: {"labels": ["a", "b"]}\n\n')
+
+        await events.aclose()
+        self.assertEqual(len(get_broker().subscriptions[get_channel(TableViewProfile)]), 0)
@@ -0,0 +1,155 @@
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase
+
+from sdh.table import QSDataSource, TableView, widgets
+from sdh.table.models import TableViewProfile
+
+from . import ProfileTable, get_controller
+
+
+class TableColumnsTest(SimpleTestCase):
+
+    def test_columns_shared(self):
+        table = ProfileTable('profiles')
+        self.assertIs(dict.__getitem__(table.columns, 'user'), ProfileTable.base_columns['user'])
+        self.assertEqual(list(table.columns), ['label', 'user', 'tableview_name'])
+
+    def test_column_customization(self):
+        table = ProfileTable('profiles')
+        table.columns['label'].label = 'Title'
+        table.columns['label'].cell_attr['class'] = 'title'
+        del table.columns['user']
+
+        self.assertEqual([column.label for column in table.columns.values()], ['Title', 'Name'])
+        self.assertEqual(ProfileTable.base_columns['label'].label, 'Label')
+        self.assertEqual(ProfileTable.base_columns['label'].cell_attr, {'class': 'label'})
+        self.assertEqual(list(ProfileTable('profiles').columns), ['label', 'user', 'tableview_name'])
+
+    def test_iteration_copies(self):
+        table = ProfileTable('profiles')
+        for key, column in table.columns.items():
+            column.label = key
+        table.columns.values()[0].cell_attr['class'] = 'changed'
+        table.columns.get('user').refname = 'user__email'
+
+        self.assertEqual([column.label for column in table.columns.values()], ['label', 'user', 'tableview_name'])
+        self.assertEqual(table.columns['label'].cell_attr, {'class': 'changed'})
+        self.assertEqual(ProfileTable.base_columns['label'].label, 'Label')
+        self.assertEqual(ProfileTable.base_columns['label'].cell_attr, {'class': 'label'})
+        self.assertEqual(ProfileTable.base_columns['user'].refname, 'user__username')
+
+    def test_render_shares_columns(self):
+        controller = get_controller()
+        table = controller.table
+
+        controller.visible_columns = ('user', 'tableview_name')
+        self.assertEqual([column for key, column in controller.iter_columns()],
+                         list(ProfileTable.base_columns.values()))
+        self.assertEqual([column for key, column in controller.iter_all_columns()],
+                         list(ProfileTable.base_columns.values()))
+        self.assertEqual(table.columns.owned, set())
+
+    def test_copy_containers(self):
+        class ChoicesWidget(widgets.LabelWidget):
+            def __init__(self, label, choices, **kwargs):
+                self.choices = choices
+                super().__init__(label, **kwargs)
+
+        class ChoicesTable(TableView):
+            state = ChoicesWidget('State', choices={'a': ['A']})
+
+        ChoicesTable('first').columns['state'].choices['a'].append('B')
+        self.assertEqual(ChoicesTable('second').columns['state'].choices, {'a': ['A']})
+        self.assertEqual(ChoicesTable.base_columns['state'].choices, {'a': ['A']})
+
+
+class SearchTable(TableView):
+    label = widgets.LabelWidget('Label')
+
+    class Meta:
+        search = ('label', 'tableview_name')
+        search_modes = {'tableview_name': 'istartswith'}
+        search_id_fields = ('id', )
+
+
+class TableSearchTest(TestCase):
+
+    def setUp(self):
+        self.first = TableViewProfile.objects.create(tableview_name='orders', label='new orders')
+        self.second = TableViewProfile.objects.create(tableview_name='invoices', label='old orders')
+
+    def search(self, value):
+        source = QSDataSource(TableViewProfile.objects.order_by('id'))
+        SearchTable('search').apply_search(value, source)
+        return list(source.qs)
+
+    def test_terms(self):
+        self.assertEqual(self.search('orders new'), [self.first])
+        self.assertEqual(self.search('"old orders"'), [self.second])
+        self.assertEqual(self.search('"orders new"'), [])
+
+    def test_modes(self):
+        self.assertEqual(SearchTable('search').construct_search('tableview_name'), 'tableview_name__istartswith')
+        self.assertEqual(self.search('inv'), [self.second])
+        self.assertEqual(self.search('voices'), [])
+
+    def test_numeric_term(self):
+        self.assertEqual(self.search(str(self.second.pk)), [self.second])
+        self.assertEqual(self.search('\u00b2'), [])
+
+    def test_numeric_term_range(self):
+        table = SearchTable('search')
+        queryset = TableViewProfile.objects.all()
+        self.assertEqual(table.construct_search_term('9' * 30, [], queryset), Q(pk__in=[]))
+        self.assertEqual(table.construct_search_term('12', [], queryset), Q(id=12))
+        self.assertEqual(table.get_id_field_range(queryset, 'label'), (None, None))
+        self.assertEqual(table.get_id_field_range(queryset, 'user')[0], table.get_id_field_range(queryset, 'id')[0])
+        self.assertEqual(self.search('9' * 30), [])
+
+
+class CountingWidget(widgets.LabelWidget):
+    calls = 0
+
+    def get_value(self, row, default=None):
+        CountingWidget.calls += 1
+        return super().get_value(row, default)
+
+
+class PlainWidget(widgets.BaseWidget):
+
+    def html_cell(self, row_index, row, request=None):
+        return 'plain %s' % row.label
+
+
+class CellTable(TableView):
+    label = CountingWidget('Label')
+    plain = PlainWidget('Plain', refname='label')
+
+    class Meta:
+        permanent = ('label', 'plain')
+
+    def cell_class_label(self, table, row_index, row, value):
+        return 'cell-%s' % value
+
+    def cell_style_label(self, table, row_index, row, value):
+        return ''
+
+
+class BoundCellTest(TestCase):
+
+    def get_row(self):
+        TableViewProfile.objects.create(tableview_name='cells', label='first')
+        return next(get_controller(CellTable('cells')).get_paginated_rows())
+
+    def test_value_resolved_once(self):
+        CountingWidget.calls = 0
+        label, plain = self.get_row()
+        self.assertEqual(label.get_cell_class(), 'cell-first')
+        label.get_cell_style()
+        self.assertEqual(label.as_html(), 'first')
+        self.assertEqual(label.as_csv(), 'first')
+        self.assertEqual(CountingWidget.calls, 1)
+
+    def test_widget_without_value_keyword(self):
+        label, plain = self.get_row()
+        self.assertEqual(plain.as_html(), 'plain first')
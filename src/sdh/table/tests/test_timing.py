@@ -0,0 +1,53 @@
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from sdh.table.models import TableViewProfile
+from sdh.table.signals import table_phase_finished
+
+from . import get_controller, get_request, get_table
+
+
+@override_settings(SDH_TABLE_SERVER_TIMING=True)
+class TimingTest(TestCase):
+
+    def setUp(self):
+        TableViewProfile.objects.create(tableview_name='test', label='profile')
+
+    def test_csv_phases(self):
+        phases = []
+
+        def receiver(sender, controller, phase, duration, **kwargs):
+            phases.append(phase)
+
+        table_phase_finished.connect(receiver)
+        try:
+            table = get_table(csv_allow=True, timing=True)
+            response = get_controller(table, get_request({'csv': '1'})).process_request()
+        finally:
+            table_phase_finished.disconnect(receiver)
+
+        self.assertEqual(phases, ['restore', 'fetch', 'csv'])
+        self.assertIn('csv;dur=', response['Server-Timing'])
+        self.assertIn('col.label;dur=', response['Server-Timing'])
+
+    def test_fetch_before_render(self):
+        spans = {}
+
+        def receiver(sender, controller, phase, duration, **kwargs):
+            end = time.perf_counter()
+            spans.setdefault(phase, (end - duration, end))
+
+        def render_to_string(template, context, request):
+            return ''.join(cell.as_html() for row in context['controller'].get_paginated_rows() for cell in row)
+
+        controller = get_controller(get_table(timing=True))
+        table_phase_finished.connect(receiver)
+        try:
+            with mock.patch('sdh.table.controller.render_to_string', render_to_string):
+                self.assertEqual(controller.as_html(), 'profile')
+        finally:
+            table_phase_finished.disconnect(receiver)
+
+        self.assertLessEqual(spans['fetch'][1], spans['render'][0])
@@ -0,0 +1,92 @@
+import gc
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.template.loader import get_template
+from django.test import SimpleTestCase
+
+from sdh.table import TableView, widgets
+from sdh.table.models import TableViewProfile
+from sdh.table.table import table_registry
+from sdh.table.warmup import (check_refnames, get_included_templates, get_table_templates, load_templates,
+                              warmup_table)
+
+
+class WarmupTable(TableView):
+    label = widgets.LabelWidget('Label')
+    user = widgets.LabelWidget('User', refname='user__username')
+    state = widgets.LabelWidget('State')
+    missing = widgets.LabelWidget('Missing', refname='user__missing')
+    is_default = widgets.BooleanWidget('Default')
+
+    class Meta:
+        model = TableViewProfile
+        template = 'sdh/table/table_row.html'
+        template_body_content = 'sdh/table/table_row.html'
+        template_paginator = 'sdh/table/missing_paginator.html'
+
+
+class TaggedItem(models.Model):
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey()
+
+    class Meta:
+        app_label = 'table'
+        managed = False
+
+
+class TaggedItemTable(TableView):
+    name = widgets.LabelWidget('Name', refname='content_object__name')
+    model = widgets.LabelWidget('Model', refname='content_type__model')
+
+    class Meta:
+        model = TaggedItem
+
+
+class DefaultTemplatesTable(TableView):
+    label = widgets.LabelWidget('Label')
+
+
+class WarmupTest(SimpleTestCase):
+
+    def test_registry(self):
+        self.assertIn(WarmupTable, table_registry)
+        self.assertNotIn(TableView, table_registry)
+
+        type('DynamicTable', (TableView, ), {})
+        gc.collect()
+        self.assertNotIn('DynamicTable', [table_class.__name__ for table_class in table_registry])
+
+    def test_templates(self):
+        templates = dict(get_table_templates(WarmupTable))
+        self.assertFalse(templates['sdh/table/table_group_row.html'])
+        self.assertTrue(templates['sdh/table/table_row.html'])
+        self.assertTrue(templates['sdh/table/missing_paginator.html'])
+        self.assertTrue(templates['sdh/table/widgets/boolean_widget.html'])
+
+    def test_check_refnames(self):
+        errors = check_refnames(WarmupTable)
+        self.assertEqual(len(errors), 1)
+        self.assertIn("'user__missing'", errors[0])
+
+    def test_check_generic_relation(self):
+        self.assertEqual(check_refnames(TaggedItemTable), [])
+
+    def test_warmup_table(self):
+        errors, warnings = warmup_table(WarmupTable)
+        self.assertEqual(len(errors), 2)
+        self.assertIn('missing_paginator.html', errors[0])
+        self.assertIn("'user__missing'", errors[1])
+
+    def test_default_templates(self):
+        errors, warnings = warmup_table(DefaultTemplatesTable)
+        self.assertEqual(errors, [])
+        self.assertTrue(any('table_paginator.html' in warning for warning in warnings))
+
+    def test_included_templates(self):
+        template = get_template('sdh/table/table_head.html')
+        self.assertEqual(get_included_templates(template), ['table_column_sort.html'])
+        self.assertEqual(load_templates([('sdh/table/table_head.html', True)])[0][:2],
+                         ('table_column_sort.html', False))
@@ -0,0 +1,127 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models.manager import Manager
+from django.test import TestCase, override_settings
+from django.urls import NoReverseMatch, reverse
+from django.utils import formats
+
+from sdh.table import TableView, widgets
+from sdh.table.urlresolvers import fast_reverse
+from sdh.table.models import TableViewProfile
+
+from . import get_controller
+
+
+class AccessorTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='john', first_name='John')
+        self.profile = TableViewProfile.objects.create(tableview_name='test', label='profile', user=self.user)
+
+    def assertSameValue(self, row, refname):
+        widget = widgets.LabelWidget('Label', refname=refname)
+        expected = widget._recursive_value(row, refname.split('__'))
+        value = widget.get_value(row)
+        if isinstance(expected, Manager):
+            self.assertEqual(list(value), list(expected.all()))
+        else:
+            self.assertEqual(value, expected)
+
+    def test_accessor_semantics(self):
+        self.assertSameValue(self.profile, 'label')
+        self.assertSameValue(self.profile, 'user__username')
+        self.assertSameValue(self.profile, 'user__get_full_name')
+        self.assertSameValue(self.profile, 'missing')
+        self.assertSameValue(self.profile, 'user__missing__deeper')
+        self.assertSameValue(self.user, 'groups__name')
+
+    def test_recursive_value_override(self):
+        class UpperWidget(widgets.LabelWidget):
+            def _recursive_value(self, row, keylist):
+                return str(super()._recursive_value(row, keylist)).upper()
+
+        self.assertEqual(UpperWidget('Label', refname='user__username').get_value(self.profile), 'JOHN')
+
+    def test_reverse_column_default(self):
+        widget = widgets.LabelWidget('Label', refname='label')
+        self.assertEqual(widget.get_value(self.profile, 'user__username'), 'john')
+        self.assertEqual(widget.get_value(self.profile, 'missing', default='-'), '-')
+
+
+@override_settings(ROOT_URLCONF='sdh.table.tests.urls')
+class FastReverseTest(TestCase):
+
+    def assertSameUrl(self, viewname, args):
+        try:
+            expected = reverse(viewname, args=args)
+        except NoReverseMatch:
+            with self.assertRaises(NoReverseMatch):
+                fast_reverse(viewname, args)
+        else:
+            self.assertEqual(fast_reverse(viewname, args), expected)
+
+    def test_same_as_reverse(self):
+        viewnames = ('profiles:index', 'profiles:detail', 'profiles:named', 'profiles:regex',
+                     'slug', 'path', 'missing', 'profiles:missing', 'missing:index')
+        for viewname in viewnames:
+            for args in ([], [1], ['a b/č'], ['x', 2], [3, 'abc'], ['//x'], [None]):
+                self.assertSameUrl(viewname, args)
+
+    def test_href_widget(self):
+        widget = widgets.HrefWidget('User', refname='username', reverse='profiles:named',
+                                    reverse_column=('username', 'pk'))
+        user = User.objects.create(username='john')
+        self.assertEqual(widget.html_cell(1, user), "<a href='/profiles/john/%d/'>john</a>" % user.pk)
+
+        widget = widgets.HrefWidget('User', refname='username', reverse='missing')
+        self.assertEqual(widget.get_url(user), '#NoReverseMatch')
+
+
+class BatchFormatTest(TestCase):
+
+    def test_same_as_single_formatting(self):
+        values = [datetime.datetime(2024, 5, 1, 10, 30, tzinfo=datetime.timezone.utc),
+                  datetime.datetime(2024, 5, 1, 10, 30, tzinfo=datetime.timezone.utc),
+                  datetime.date(2024, 5, 2),
+                  None]
+        for widget in (widgets.DateTimeWidget('Date'),
+                       widgets.DateTimeWidget('Date', format='Y-m-d'),
+                       widgets.LocalDateTimeWidget('Date'),
+                       widgets.LocalDateWidget('Date')):
+            expected = [widget.html_cell(1, None, value=value) for value in values]
+            self.assertEqual(widget.format_values(values), expected)
+
+        self.assertEqual(widgets.LocalDateWidget('Date').format_values(values[:1]),
+                         [formats.date_format(values[0], 'DATE_FORMAT')])
+
+    @override_settings(USE_THOUSAND_SEPARATOR=True)
+    def test_number_widget(self):
+        widget = widgets.NumberWidget('Amount', decimal_pos=2)
+        values = [1234567, Decimal('1.5'), Decimal('1.50'), 2.5, None]
+        self.assertEqual(widget.format_values(values),
+                         [formats.number_format(value, 2) for value in values[:-1]] + [' '])
+
+        widget = widgets.NumberWidget('Amount')
+        self.assertEqual(widget.format_values([Decimal('1.5'), Decimal('1.50')]), ['1.5', '1.50'])
+
+    def test_html_cell_override(self):
+        class BoldNumberWidget(widgets.NumberWidget):
+            def html_cell(self, row_index, row, **kwargs):
+                return '<b>%s</b>' % super().html_cell(row_index, row, **kwargs)
+
+        class NumberTable(TableView):
+            id = widgets.NumberWidget('Id')
+            bold_id = BoldNumberWidget('Bold id', refname='id')
+
+            class Meta:
+                permanent = ('id', 'bold_id')
+
+        profile = TableViewProfile.objects.create(tableview_name='test', label='profile')
+        controller = get_controller(NumberTable('numbers'))
+        controller.prepare_source()
+
+        self.assertEqual([key for key, column in controller.get_batch_columns()], ['id'])
+        rows = [[cell.as_html() for cell in row] for row in controller.get_paginated_rows()]
+        self.assertEqual(rows, [[str(profile.id), '<b>%s</b>' % profile.id]])
@@ -0,0 +1,20 @@
+from django.http import HttpResponse
+from django.urls import include, path, re_path
+
+
+def view(request, *args, **kwargs):
+    return HttpResponse()
+
+
+profile_patterns = ([
+    path('', view, name='index'),
+    path('<int:pk>/', view, name='detail'),
+    path('<str:name>/<int:pk>/', view, name='named'),
+    re_path(r'^regex/(\d+)/([a-z]+)/$', view, name='regex'),
+], 'profiles')
+
+urlpatterns = [
+    path('profiles/', include(profile_patterns)),
+    path('slug/<slug:slug>/', view, name='slug'),
+    path('path/<path:value>/', view, name='path'),
+]
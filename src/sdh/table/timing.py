@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+
+from .signals import table_phase_finished
+
+
+class NullTimer:
+    """
+    Timer used when instrumentation is disabled, all phases are no-op.
+    """
+    enabled = False
+    _null = nullcontext()
+
+    def phase(self, name):
+        return self._null
+
+    def column(self, key):
+        return self._null
+
+    def server_timing(self):
+        return ''
+
+
+NULL_TIMER = NullTimer()
+
+
+class PhaseTimer:
+    """
+    Collect duration of named phases and per column render time.
+    ``table_phase_finished`` signal is sent for every finished phase.
+    """
+    enabled = True
+
+    def __init__(self, controller=None):
+        self.controller = controller
+        self.phases = OrderedDict()
+        self.columns = OrderedDict()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0) + duration
+            table_phase_finished.send(sender=self.__class__,
+                                      controller=self.controller,
+                                      phase=name,
+                                      duration=duration)
+
+    @contextmanager
+    def column(self, key):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.columns[key] = self.columns.get(key, 0) + time.perf_counter() - start
+
+    def server_timing(self):
+        """
+        Return value for ``Server-Timing`` header, durations are in milliseconds.
+        """
+        items = ['%s;dur=%.2f' % (name, duration * 1000) for name, duration in self.phases.items()]
+        items.extend('col.%s;dur=%.2f' % (key, duration * 1000) for key, duration in self.columns.items())
+        return ', '.join(items)
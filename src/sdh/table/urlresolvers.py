@@ -0,0 +1,99 @@
+import re
+from urllib.parse import quote
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.urls import get_resolver, get_script_prefix, get_urlconf, reverse
+from django.urls.resolvers import get_ns_resolver
+from django.utils.http import RFC3986_SUBDELIMS, escape_leading_slashes
+from django.utils.translation import get_language
+
+_builders = {}
+
+
+class UrlBuilder:
+    """
+    URL pattern of a view name resolved once into format strings,
+    filled with row values the same way as ``django.urls.reverse`` does.
+    """
+
+    def __init__(self, resolver, view, prefix):
+        self.candidates = []
+        for possibility, pattern, defaults, converters in resolver.reverse_dict.getlist(view):
+            regex = re.compile('^%s%s' % (re.escape(prefix), pattern))
+            for result, params in possibility:
+                self.candidates.append((prefix.replace('%', '%%') + result, params, regex, converters))
+
+    def build(self, args):
+        for candidate_pat, params, regex, converters in self.candidates:
+            if len(args) != len(params):
+                continue
+            text_candidate_subs = {}
+            for key, value in zip(params, args):
+                if key in converters:
+                    try:
+                        text_candidate_subs[key] = converters[key].to_url(value)
+                    except ValueError:
+                        break
+                else:
+                    text_candidate_subs[key] = str(value)
+            else:
+                url = candidate_pat % text_candidate_subs
+                if regex.search(url):
+                    return escape_leading_slashes(quote(url, safe=RFC3986_SUBDELIMS + '/~:@'))
+        return None
+
+
+def _get_resolver(viewname, urlconf):
+    resolver = get_resolver(urlconf)
+    *path, view = viewname.split(':')
+    ns_pattern = ''
+    ns_converters = {}
+    for ns in path:
+        try:
+            app_list = resolver.app_dict[ns]
+            if ns not in app_list:
+                ns = app_list[0]
+        except KeyError:
+            pass
+        extra, resolver = resolver.namespace_dict[ns]
+        ns_pattern += extra
+        ns_converters.update(resolver.pattern.converters)
+    if ns_pattern:
+        resolver = get_ns_resolver(ns_pattern, resolver, tuple(ns_converters.items()))
+    return resolver, view
+
+
+def get_url_builder(viewname):
+    urlconf = get_urlconf()
+    prefix = get_script_prefix()
+    key = (get_resolver(urlconf), get_language(), prefix, viewname)
+    builder = _builders.get(key)
+    if builder is None:
+        try:
+            resolver, view = _get_resolver(viewname, urlconf)
+        except KeyError:
+            return None
+        builder = _builders[key] = UrlBuilder(resolver, view, prefix)
+    return builder
+
+
+def fast_reverse(viewname, args):
+    """
+    Equivalent of ``reverse(viewname, args=args)`` which resolves URL pattern of
+    ``viewname`` once per URLconf, language and script prefix.
+    """
+    if isinstance(viewname, str):
+        builder = get_url_builder(viewname)
+        if builder is not None:
+            url = builder.build(args)
+            if url is not None:
+                return url
+    # let Django raise NoReverseMatch with detailed message
+    return reverse(viewname, args=args)
+
+
+@receiver(setting_changed)
+def clear_url_builders(*, setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        _builders.clear()
@@ -0,0 +1,138 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models.constants import LOOKUP_SEP
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.template.loader_tags import IncludeNode
+from django.utils.module_loading import autodiscover_modules
+
+from .table import table_registry
+from .urlresolvers import get_url_builder
+
+TEMPLATE_OPTIONS = ('template', 'template_body_content', 'template_paginator', 'template_row',
+                    'template_group_row')
+
+
+def autodiscover():
+    """
+    Import ``tables`` module of installed applications, so their tables are registered.
+    """
+    autodiscover_modules('tables')
+
+
+def get_table_templates(table_class):
+    """
+    Return list of (template name, required) the table is rendered with. Templates
+    set by the table and widget templates are required, default table templates
+    may be not provided by project which does not use them.
+    """
+    from .table import TableView
+
+    templates = {}
+    for option in TEMPLATE_OPTIONS:
+        name = getattr(table_class, option)
+        templates[name] = templates.get(name, False) or name != getattr(TableView, option)
+    for column in table_class.base_columns.values():
+        template = getattr(column, 'template', None)
+        if isinstance(template, str):
+            templates[template] = True
+    return list(templates.items())
+
+
+def get_included_templates(template):
+    """
+    Return names of templates included by constant name into loaded template.
+    """
+    nodelist = getattr(getattr(template, 'template', None), 'nodelist', None)
+    if nodelist is None:
+        return []
+    return [node.template.var for node in nodelist.get_nodes_by_type(IncludeNode)
+            if isinstance(node.template.var, str)]
+
+
+def check_refnames(table_class):
+    """
+    Return list of errors for column refnames which do not resolve against ``Meta.model``.
+    """
+    model = table_class.model
+    if model is None:
+        return []
+
+    errors = []
+    for key, column in table_class.base_columns.items():
+        if column.expression is not None:
+            continue
+        opts = model._meta
+        for part in column.refname.split(LOOKUP_SEP):
+            try:
+                field = opts.get_field(part)
+            except FieldDoesNotExist:
+                if not hasattr(opts.model, part):
+                    errors.append('%s.%s: %r does not resolve on %s' % (
+                        table_class.__name__, key, column.refname, opts.label))
+                # property or method, the rest of the path is not checked
+                break
+            if not field.is_relation or field.related_model is None:
+                # generic relation target is not known, the rest of the path is not checked
+                break
+            opts = field.related_model._meta
+    return errors
+
+
+def load_templates(templates):
+    """
+    Load templates and templates they include into template loaders cache.
+    Return list of (template name, required, error) for templates which can not be loaded.
+    """
+    failed = []
+    seen = set()
+    pending = list(templates)
+    while pending:
+        name, required = pending.pop(0)
+        if name in seen:
+            continue
+        seen.add(name)
+        try:
+            template = get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+            failed.append((name, required, e))
+            continue
+        # included templates are checked at render time only, so they are optional here
+        pending.extend((included, False) for included in get_included_templates(template))
+    return failed
+
+
+def warmup_table(table_class):
+    """
+    Load templates of the table into template loaders cache, resolve URL patterns
+    of its links and check refnames. Return lists of errors and warnings.
+    """
+    errors = []
+    warnings = []
+    for name, required, e in load_templates(get_table_templates(table_class)):
+        message = '%s: template %s: %s' % (table_class.__name__, name, e)
+        if required:
+            errors.append(message)
+        else:
+            warnings.append(message)
+
+    for column in table_class.base_columns.values():
+        reverse = getattr(column, 'reverse', None)
+        if isinstance(reverse, str):
+            get_url_builder(reverse)
+
+    errors.extend(check_refnames(table_class))
+    return errors, warnings
+
+
+def warmup():
+    """
+    Warm up all registered tables, return lists of errors and warnings.
+    """
+    autodiscover()
+    errors = []
+    warnings = []
+    for table_class in list(table_registry):
+        table_errors, table_warnings = warmup_table(table_class)
+        errors.extend(table_errors)
+        warnings.extend(table_warnings)
+    return errors, warnings
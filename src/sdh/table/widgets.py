@@ -1,28 +1,84 @@
 import datetime
-from django.utils import formats, timezone
-from django.utils.formats import date_format
+from copy import deepcopy
+from decimal import Decimal
+
+from django.utils import dateformat, formats, numberformat, timezone
 from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
 from django.utils.html import escape
 
 from django.db.models.manager import Manager
 from django.db.models.constants import LOOKUP_SEP
 from django.template.loader import render_to_string
-from django.urls import reverse, NoReverseMatch
+from django.urls import NoReverseMatch
+
+from .urlresolvers import fast_reverse
+
+_MISSING = object()
+
+
+def compile_accessor(refname):
+    """
+    Build function which returns value of ``refname`` lookup path for a row.
+    Semantics are the same as of ``BaseWidget._recursive_value``: missing attribute
+    gives None, manager is returned as is and callables are called.
+    """
+    keys = tuple(refname.split(LOOKUP_SEP))
+
+    if len(keys) == 1:
+        key = keys[0]
+
+        def accessor(row):
+            value = getattr(row, key, _MISSING)
+            if value is _MISSING:
+                return None
+            if callable(value) and not isinstance(value, Manager):
+                return value()
+            return value
+        return accessor
+
+    def accessor(row):
+        value = row
+        for key in keys:
+            value = getattr(value, key, _MISSING)
+            if value is _MISSING:
+                return None
+            if isinstance(value, Manager):
+                return value
+            if callable(value):
+                value = value()
+        return value
+    return accessor
 
 
 class BaseWidget:
     creation_counter = 0
 
-    def __init__(self, label, refname=None, width=None, title_attr=None, cell_attr=None):
+    def __init__(self, label, refname=None, width=None, title_attr=None, cell_attr=None, aggregate=None,
+                 expression=None):
         self.label = label
         self.refname = refname
+        # database expression (F, Case, Concat, Subquery...) annotated to datasource as ``refname``
+        self.expression = expression
         self.title_attr = title_attr
         self.cell_attr = cell_attr
         self.width = width
+        # footer aggregates: 'sum', 'avg', 'min', 'max', 'count' or tuple of them
+        self.aggregate = (aggregate,) if isinstance(aggregate, str) else tuple(aggregate or ())
+        self.accessors = {}
         # Increase the creation counter, and save our local copy.
         self.creation_counter = BaseWidget.creation_counter
         BaseWidget.creation_counter += 1
 
+    def __copy__(self):
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        for name, value in self.__dict__.items():
+            # accessors cache is keyed by refname, so it is shared
+            if name != 'accessors' and isinstance(value, (dict, list, set)):
+                obj.__dict__[name] = deepcopy(value)
+        return obj
+
     def html_title(self):
         return self.label
 
@@ -38,18 +94,45 @@ class BaseWidget:
                 return self._recursive_value(value, keylist[1:])
         return value
 
+    def compile(self):
+        """
+        Prepare accessors for refnames used by widget. Called once on table class creation.
+        """
+        if self.refname:
+            self.get_accessor(self.refname)
+
+    def get_accessor(self, refname):
+        accessor = self.accessors.get(refname)
+        if accessor is None:
+            accessor = self.accessors[refname] = compile_accessor(refname)
+        return accessor
+
     def get_value(self, row, refname=None, default=None):
-        if refname is None and self.refname is None:
+        refname = refname or self.refname
+        if refname is None:
             return default
-        value = self._recursive_value(row, (refname or self.refname).split(LOOKUP_SEP))
+        if type(self)._recursive_value is not BaseWidget._recursive_value:
+            # subclass resolves values its own way
+            value = self._recursive_value(row, refname.split(LOOKUP_SEP))
+        else:
+            value = self.get_accessor(refname)(row)
         if value is not None:
             if isinstance(value, Manager):
                 return value.all()
             return value
         return default
 
+    def get_cell_value(self, row, kwargs, default=None):
+        """
+        Return value passed by bound cell in ``kwargs`` or resolve it from the row.
+        """
+        if 'value' in kwargs:
+            value = kwargs['value']
+            return default if value is None else value
+        return self.get_value(row, default=default)
+
     def html_cell(self, row_index, row, **kwargs):
-        value = self.get_value(row)
+        value = self.get_cell_value(row, kwargs)
         return value or ' '
 
     def _dict2attr(self, attr):
@@ -74,7 +157,49 @@ class LabelWidget(BaseWidget):
     pass
 
 
-class DateTimeWidget(BaseWidget):
+class BatchFormatWidget(BaseWidget):
+    """
+    Base widget which formats values of a whole page column at once.
+    ``get_formatter`` resolves format, locale and timezone once and returns
+    callable formatting one value; repeated values are formatted only once.
+    """
+    batch_format = True
+    empty_value = ' '
+
+    def get_formatter(self):
+        raise NotImplementedError
+
+    def is_empty(self, value):
+        return value is None
+
+    def get_cache_key(self, value):
+        return value.__class__, value
+
+    def format_values(self, values):
+        formatter = self.get_formatter()
+        cache = {}
+        result = []
+        for value in values:
+            if self.is_empty(value):
+                result.append(self.empty_value)
+                continue
+            key = self.get_cache_key(value)
+            try:
+                text = cache.get(key)
+            except TypeError:
+                # unhashable value
+                result.append(formatter(value))
+                continue
+            if text is None:
+                text = cache[key] = formatter(value)
+            result.append(text)
+        return result
+
+    def html_cell(self, row_index, row, **kwargs):
+        return self.format_values([self.get_cell_value(row, kwargs)])[0]
+
+
+class DateTimeWidget(BatchFormatWidget):
     """
     DateTimeWidget for table field which renders the field with localized datetime as column value
     """
@@ -82,44 +207,42 @@ class DateTimeWidget(BaseWidget):
         self.format = format
         super(DateTimeWidget, self).__init__(label, **kwargs)
 
-    def html_cell(self, row_index, row, **kwarg):
-        value = self.get_value(row)
-        if isinstance(value, datetime.datetime) and not self.format:
-            _format = 'DATETIME_FORMAT'
-        elif isinstance(value, datetime.date) and not self.format:
-            _format = 'DATE_FORMAT'
-        else:
-            _format = self.format
+    def is_empty(self, value):
+        return not value
 
-        if value:
-            return formats.date_format(value, _format)
-        return ' '
+    def get_cache_key(self, value):
+        return value.__class__, value, getattr(value, 'tzinfo', None)
 
+    def get_formatter(self):
+        datetime_format = formats.get_format(self.format or 'DATETIME_FORMAT')
+        date_format = formats.get_format(self.format or 'DATE_FORMAT')
 
-class LocalDateTimeWidget(BaseWidget):
+        def formatter(value):
+            if isinstance(value, datetime.datetime):
+                return dateformat.format(value, datetime_format)
+            return dateformat.format(value, date_format)
+        return formatter
+
+
+class LocalDateTimeWidget(DateTimeWidget):
     """
     LocalDateTimeWidget for table field which renders the field with localized datetime as column value
     """
     def __init__(self, *args, format=None, **attrs):
-        self.format = format
-        super().__init__(*args, **attrs)
+        super().__init__(*args, format=format, **attrs)
 
-    def html_cell(self, row_index, row, **kwargs):
-        value = self.get_value(row)
-        if value is None:
-            return ' '
+    def is_empty(self, value):
+        return value is None
 
-        if isinstance(value, datetime.datetime) and timezone.is_aware(value):
-            value = timezone.make_naive(value)
+    def get_formatter(self):
+        formatter = super().get_formatter()
+        tz = timezone.get_current_timezone()
 
-        if isinstance(value, datetime.datetime) and not self.format:
-            _format = 'DATETIME_FORMAT'
-        elif isinstance(value, datetime.date) and not self.format:
-            _format = 'DATE_FORMAT'
-        else:
-            _format = self.format
-
-        return date_format(value, _format)
+        def local_formatter(value):
+            if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+                value = timezone.make_naive(value, tz)
+            return formatter(value)
+        return local_formatter
 
 
 class LocalDateWidget(LocalDateTimeWidget):
@@ -128,6 +251,35 @@ class LocalDateWidget(LocalDateTimeWidget):
         super().__init__(*args, format=_format, **attrs)
 
 
+class NumberWidget(BatchFormatWidget):
+    """
+    NumberWidget for table field which renders the field with localized number as column value
+    Usage example:
+        amount = widgets.NumberWidget(_('Amount'), decimal_pos=2, use_grouping=True)
+    """
+    def __init__(self, label, decimal_pos=None, use_grouping=False, **kwargs):
+        self.decimal_pos = decimal_pos
+        self.use_grouping = use_grouping
+        super().__init__(label, **kwargs)
+
+    def get_cache_key(self, value):
+        if isinstance(value, Decimal):
+            # Decimal('1.5') == Decimal('1.50') but they are rendered differently
+            return Decimal, str(value)
+        return value.__class__, value
+
+    def get_formatter(self):
+        lang = get_language()
+        decimal_sep = formats.get_format('DECIMAL_SEPARATOR', lang)
+        grouping = formats.get_format('NUMBER_GROUPING', lang)
+        thousand_sep = formats.get_format('THOUSAND_SEPARATOR', lang)
+
+        def formatter(value):
+            return numberformat.format(value, decimal_sep, self.decimal_pos, grouping, thousand_sep,
+                                       force_grouping=self.use_grouping)
+        return formatter
+
+
 class HrefWidget(BaseWidget):
     """
     HrefWidget for table field which renders field with href to view
@@ -145,10 +297,15 @@ class HrefWidget(BaseWidget):
             self.reverse_column = reverse_column
         super(HrefWidget, self).__init__(label, **kwargs)
 
+    def compile(self):
+        super().compile()
+        for column in self.reverse_column:
+            self.get_accessor(column)
+
     def get_url(self, row):
         if self.reverse:
             try:
-                return reverse(self.reverse, args=[self.get_value(row, col) for col in self.reverse_column])
+                return fast_reverse(self.reverse, [self.get_value(row, col) for col in self.reverse_column])
             except NoReverseMatch:
                 return "#NoReverseMatch"
         return self.href
@@ -159,7 +316,7 @@ class HrefWidget(BaseWidget):
 
     def html_cell(self, row_index, row, **kwargs):
         href = self.get_url(row)
-        value = self.get_value(row, default='')
+        value = self.get_cell_value(row, kwargs, default='')
         if href:
             return self.render_url(href, value)
         return value
@@ -184,7 +341,7 @@ class ConditionHrefWidget(HrefWidget):
         _request = kwargs.pop('request', None)
         is_href = True
         href = None
-        value = self.get_value(row, default='')
+        value = self.get_cell_value(row, kwargs, default='')
         if self.condition and callable(self.condition):
             is_href &= bool(self.condition(row, _request))
         if self.acl and hasattr(_request, 'acl'):
@@ -218,7 +375,7 @@ class TemplateWidget(BaseWidget):
         super(TemplateWidget, self).__init__(label, **kwargs)
 
     def html_cell(self, row_index, row, **kwargs):
-        value = self.get_value(row, default=None)
+        value = self.get_cell_value(row, kwargs)
         _request = self.request or kwargs.pop('request', self.request)
         return mark_safe(render_to_string(self.template,
                                           {'item': row,
@@ -239,7 +396,7 @@ class BooleanWidget(TemplateWidget):
         self.null = null
 
     def html_cell(self, row_index, row, **kwargs):
-        value = self.get_value(row, default=None)
+        value = self.get_cell_value(row, kwargs)
         _request = self.request or kwargs.pop('request', self.request)
         return mark_safe(render_to_string(self.template,
                                           {'item': row,